@@ -26,6 +26,7 @@ from .modules import bebtools_core as core
 from .modules import bebtools_queue as queue
 from .modules import bebtools_script as script
 from .modules import bebtools_instructions as instr
+from .modules.bebtools_utils import cancel_scripts_load, cancel_search, cancel_prewarm, start_watching, stop_watching, unload_script_modules
 
 
 def script_context_menu(self, context):
@@ -50,10 +51,16 @@ def register():
     for cls in instr.classes:
         bpy.utils.register_class(cls)
     bpy.app.timers.register(core.init_scripts_timer, first_interval=0.1)
+    start_watching()
 
 def unregister():
     if bpy.app.timers.is_registered(core.init_scripts_timer):
         bpy.app.timers.unregister(core.init_scripts_timer)
+    stop_watching()
+    cancel_scripts_load()
+    cancel_search()
+    cancel_prewarm()
+    unload_script_modules()
     for cls in reversed(instr.classes):
         bpy.utils.unregister_class(cls)
     for cls in reversed(script.classes):
@@ -0,0 +1,22 @@
+"""Run a saved Beb.Tools queue on many .blend files at once, without the UI:
+
+    blender -b -P bebtools_batch.py -- --queue cleanup --files "shots/**/*.blend" -j 8
+
+or share the files out to workers on other machines through a spool folder:
+
+    blender -b -P bebtools_batch.py -- --spool /mnt/farm/spool --submit --queue cleanup --files "shots/**/*.blend"
+    blender -b -P bebtools_batch.py -- --spool /mnt/farm/spool --work          (on each node)
+    blender -b -P bebtools_batch.py -- --spool /mnt/farm/spool --status --report nightly.json
+
+Each file is opened in its own background Blender, the queue is run on it and
+the file is saved. A JSON report of every file and step is written at the end.
+Pass --help after the -- for all options.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from modules.bebtools_batch import main
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []))
@@ -0,0 +1,430 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import tempfile
+import traceback
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .bebtools_catalog import ADDON_DIR, CACHE_DIR
+from .bebtools_library import ScriptLibrary, norm
+from .bebtools_metadata import MetadataCache
+from .bebtools_runner import CodeCache, ScriptModules, is_module_script
+from .bebtools_spool import JobSpool, heartbeat, still_claimed, worker_name
+from .bebtools_queuefile import QUEUE_EXTENSIONS, read_queue, resolve_queue as resolve_items
+
+SCRIPTS_DIR = os.path.join(ADDON_DIR, "scripts")
+QUEUES_DIR = os.path.join(ADDON_DIR, "queues")
+
+# Reports land here unless --report says otherwise
+BATCH_DIR = os.path.join(CACHE_DIR, "batch")
+
+# Entry point each worker Blender runs with -P
+BATCH_SCRIPT = os.path.join(ADDON_DIR, "bebtools_batch.py")
+
+# Lines of a failed worker's console output kept in the report
+OUTPUT_TAIL = 30
+
+# Seconds a spool worker waits before looking for new jobs again
+SPOOL_POLL = 5.0
+
+
+def queue_path(name):
+    """A saved queue by name (queues/<name>.json or .txt) or by file path."""
+    if os.path.isfile(name) or name.endswith(QUEUE_EXTENSIONS):
+        return name
+    for extension in QUEUE_EXTENSIONS:
+        path = os.path.join(QUEUES_DIR, name + extension)
+        if os.path.exists(path):
+            return path
+    return os.path.join(QUEUES_DIR, name + QUEUE_EXTENSIONS[0])
+
+
+def addon_roots():
+    """Library roots set in the add-on preferences, if the add-on is enabled in this Blender."""
+    try:
+        import bpy
+    except ImportError:
+        return []
+    for addon in bpy.context.preferences.addons:
+        module = sys.modules.get(addon.module)
+        if not module or norm(os.path.dirname(module.__file__)) != norm(ADDON_DIR):
+            continue
+        return [
+            (os.path.normpath(bpy.path.abspath(root.path)), root.name, root.read_only)
+            for root in addon.preferences.library_roots if root.path.strip()
+        ]
+    return []
+
+
+def resolve_queue(items, extra_roots=()):
+    """[{name, path, params}] for the saved queue items found in the library, and the missing names."""
+    library = ScriptLibrary(CACHE_DIR)
+    roots = [(path, os.path.basename(path), True) for path in extra_roots]
+    library.set_roots(roots + addon_roots() + [(SCRIPTS_DIR, "Beb.Tools", False)])
+    metadata = MetadataCache(os.path.join(CACHE_DIR, "metadata.json"))
+    resolved, missing, changed = resolve_items(items, library, metadata.content_hash)
+    library.save()
+    if changed:
+        print(f"Changed since the queue was saved: {', '.join(changed)}")
+    return [{"name": name, "path": path, "params": params} for name, path, params in resolved], missing
+
+
+def expand_files(patterns):
+    files = {}
+    for pattern in patterns:
+        for path in glob.glob(os.path.expanduser(pattern), recursive=True):
+            if path.endswith(".blend") and os.path.isfile(path):
+                files.setdefault(norm(path), os.path.abspath(path))
+    return sorted(files.values())
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def run_job(job, still_ours=None):
+    """Run the steps of a job on its .blend inside this Blender and save it.
+
+    Steps keep going after a failure, as in a queue run from the panel, but a
+    file with a failed step is only saved if the job says so. still_ours is
+    asked right before saving; if it says no, the file is left unsaved and
+    the result is marked reclaimed.
+    """
+    import bpy
+    result = {"blend": job["blend"], "ok": False, "saved": False, "duration": 0.0, "steps": [], "error": ""}
+    clock = time.perf_counter()
+    code_cache = CodeCache(os.path.join(CACHE_DIR, "bytecode"))
+    metadata = MetadataCache(os.path.join(CACHE_DIR, "metadata.json"))
+    script_modules = ScriptModules(code_cache)
+    try:
+        if not bpy.data.filepath or norm(bpy.data.filepath) != norm(job["blend"]):
+            bpy.ops.wm.open_mainfile(filepath=job["blend"])
+        for step in job["steps"]:
+            record = {"name": step["name"], "path": step["path"], "duration": 0.0, "error": ""}
+            step_clock = time.perf_counter()
+            print(f"Running {step['name']} on {os.path.basename(job['blend'])}")
+            try:
+                if is_module_script(metadata.get(step["path"])):
+                    script_modules.run(step["path"], bpy.context, step.get("params"))
+                else:
+                    exec(code_cache.get(step["path"]), {"__name__": "__main__", "__file__": step["path"]})
+            except Exception as e:
+                record["error"] = str(e) or type(e).__name__
+                traceback.print_exc()
+            record["duration"] = time.perf_counter() - step_clock
+            result["steps"].append(record)
+        failed = [record["name"] for record in result["steps"] if record["error"]]
+        if failed and not job.get("save_failed"):
+            result["error"] = f"Not saved, failed steps: {', '.join(failed)}"
+        elif job.get("save", True) and still_ours and not still_ours():
+            result["error"] = "Not saved: the job was handed to another worker meanwhile"
+            result["reclaimed"] = True
+        elif job.get("save", True):
+            if job.get("output"):
+                os.makedirs(os.path.dirname(job["output"]), exist_ok=True)
+                bpy.ops.wm.save_as_mainfile(filepath=job["output"], copy=True)
+            else:
+                bpy.ops.wm.save_mainfile()
+            result["saved"] = True
+        result["ok"] = not failed and not result.get("reclaimed")
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+        traceback.print_exc()
+    finally:
+        script_modules.unload_all()
+    result["duration"] = time.perf_counter() - clock
+    return result
+
+
+def worker_main(job_path):
+    with open(job_path, "r") as f:
+        job = json.load(f)
+    result = run_job(job)
+    write_json(job["result"], result)
+    return 0 if result["ok"] else 1
+
+
+def spawn_worker(blender, job, job_dir, index, timeout=None):
+    """Run one job in a fresh background Blender and return its result,
+    or a failure record if the worker died or timed out before reporting."""
+    job_path = os.path.join(job_dir, f"job-{index}.json")
+    job = dict(job, result=os.path.join(job_dir, f"result-{index}.json"))
+    write_json(job_path, job)
+    command = [blender, "-b", job["blend"], "--python-exit-code", "1", "-P", BATCH_SCRIPT, "--", "--worker", job_path]
+    clock = time.perf_counter()
+    error = ""
+    try:
+        process = subprocess.run(
+            command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=timeout,
+            text=True, errors="replace",
+        )
+        output, returncode = process.stdout, process.returncode
+    except subprocess.TimeoutExpired as e:
+        output = e.output.decode(errors="replace") if isinstance(e.output, bytes) else (e.output or "")
+        returncode = None
+        error = f"Timed out after {timeout:g}s"
+    except OSError as e:
+        output, returncode = "", None
+        error = f"Could not start Blender: {e}"
+    try:
+        with open(job["result"], "r") as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        result = {
+            "blend": job["blend"], "ok": False, "saved": False, "steps": [],
+            "error": error or f"Worker exited with code {returncode} before reporting",
+        }
+    result["returncode"] = returncode
+    result["wall"] = time.perf_counter() - clock
+    if not result["ok"]:
+        result["output"] = output.splitlines()[-OUTPUT_TAIL:]
+    return result
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="blender -b -P bebtools_batch.py --",
+        description="Run a saved Beb.Tools queue on many .blend files in parallel background Blenders, "
+                    "or through a spool folder shared by workers on several machines.",
+    )
+    parser.add_argument("--queue", help="Saved queue name (queues/<name>.json or .txt) or path to a queue file")
+    parser.add_argument("--files", nargs="+", default=[], help="Glob patterns of .blend files; ** recurses")
+    parser.add_argument("-j", "--jobs", type=int, help="Blender processes at once (default: one per core, "
+                                                      "or one with --work)")
+    parser.add_argument("--root", action="append", default=[], help="Extra script library root, searched first")
+    parser.add_argument("--output-dir", help="Save processed files here, mirroring their folders, instead of in place")
+    parser.add_argument("--no-save", action="store_true", help="Run the queue without saving the files")
+    parser.add_argument("--save-failed", action="store_true", help="Save files even if a step failed")
+    parser.add_argument("--timeout", type=float, help="Seconds before a file's worker is killed")
+    parser.add_argument("--report", help="Report path (default: cache/batch/<queue>-<time>.json)")
+    parser.add_argument("--blender", help="Blender executable for the workers (default: this one)")
+    spool = parser.add_argument_group("spool", "Share the work through a folder instead of a local pool")
+    spool.add_argument("--spool", help="Shared spool folder")
+    spool.add_argument("--submit", action="store_true", help="Add one job per file to the spool")
+    spool.add_argument("--work", action="store_true", help="Claim and run spool jobs until stopped")
+    spool.add_argument("--exit-when-empty", action="store_true", help="Stop working once nothing is pending")
+    spool.add_argument("--status", action="store_true", help="Show job counts; with --report, collect the results")
+    spool.add_argument("--poll", type=float, default=SPOOL_POLL, help="Seconds between checks for new jobs")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    modes = args.submit + args.work + args.status
+    if args.spool and modes != 1:
+        parser.error("--spool needs exactly one of --submit, --work or --status")
+    if modes and not args.spool:
+        parser.error("--submit, --work and --status need --spool")
+    if (args.submit or not (args.spool or args.worker)) and (not args.queue or not args.files):
+        parser.error("--queue and --files are required")
+    return args
+
+
+def blender_binary(args):
+    if args.blender:
+        return args.blender
+    try:
+        import bpy
+        return bpy.app.binary_path
+    except ImportError:
+        return "blender"
+
+
+def load_steps(args):
+    """Queue name and resolved steps from the arguments, compiled and parsed once
+    up front, so workers only read the caches and a broken script stops the run
+    before any file is touched. Returns (name, None) after printing why not."""
+    queue_name = os.path.splitext(os.path.basename(args.queue))[0]
+    try:
+        items = read_queue(queue_path(args.queue))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Could not read queue {args.queue}: {e}")
+        return queue_name, None
+    steps, missing = resolve_queue(items, args.root)
+    if missing:
+        print(f"Could not find scripts: {', '.join(missing)}")
+        return queue_name, None
+    code_cache = CodeCache(os.path.join(CACHE_DIR, "bytecode"))
+    metadata = MetadataCache(os.path.join(CACHE_DIR, "metadata.json"))
+    for step in steps:
+        try:
+            code_cache.get(step["path"])
+        except (OSError, SyntaxError) as e:
+            print(f"Can't run {step['name']}: {e}")
+            return queue_name, None
+        metadata.get(step["path"])
+    metadata.save()
+    return queue_name, steps
+
+
+def common_base(files):
+    """Folder the files are named relative to, or None when they share none
+    (files on different Windows drives)."""
+    try:
+        return os.path.commonpath([os.path.dirname(path) for path in files])
+    except ValueError:
+        return None
+
+
+def relative_name(path, base):
+    """path relative to base, or the whole path with its drive as a folder."""
+    if base is not None:
+        return os.path.relpath(path, base)
+    drive, rest = os.path.splitdrive(path)
+    return os.path.join(drive.replace(":", "").strip("\\/"), rest.lstrip("\\/"))
+
+
+def build_jobs(args, files):
+    base = common_base(files)
+    jobs = []
+    for path in files:
+        output = os.path.join(os.path.abspath(args.output_dir), relative_name(path, base)) if args.output_dir else None
+        jobs.append({"blend": path, "save": not args.no_save, "save_failed": args.save_failed, "output": output})
+    return jobs
+
+
+def write_report(args, queue_name, steps, started, duration, workers, results):
+    failed = [result for result in results if not result["ok"]]
+    report = {
+        "queue": queue_name,
+        "steps": steps,
+        "started": started,
+        "duration": duration,
+        "workers": workers,
+        "files": len(results),
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed),
+        "results": results,
+    }
+    report_path = args.report or os.path.join(BATCH_DIR, f"{queue_name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    write_json(report_path, report)
+    print(f"{report['succeeded']} of {len(results)} files done in {duration:.1f}s; report: {report_path}")
+    return 1 if failed else 0
+
+
+def run_batch(args):
+    queue_name, steps = load_steps(args)
+    if steps is None:
+        return 1
+    files = expand_files(args.files)
+    if not files:
+        print("No .blend files matched")
+        return 1
+    jobs = [dict(job, steps=steps) for job in build_jobs(args, files)]
+    base = common_base(files)
+    blender = blender_binary(args)
+    workers = max(1, min(args.jobs or os.cpu_count() or 1, len(jobs)))
+    print(f"Running queue '{queue_name}' ({len(steps)} scripts) on {len(jobs)} files with {workers} workers")
+    started = time.time()
+    clock = time.perf_counter()
+    results = [None] * len(jobs)
+    with tempfile.TemporaryDirectory(prefix="bebtools_batch_") as job_dir:
+        with ThreadPoolExecutor(workers) as pool:
+            futures = {
+                pool.submit(spawn_worker, blender, job, job_dir, index, args.timeout): index
+                for index, job in enumerate(jobs)
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                index = futures[future]
+                results[index] = result = future.result()
+                status = "ok" if result["ok"] else f"FAILED: {result['error']}"
+                print(f"[{done}/{len(jobs)}] {relative_name(result['blend'], base)} {result['wall']:.1f}s {status}")
+    return write_report(args, queue_name, steps, started, time.perf_counter() - clock, workers, results)
+
+
+def submit_jobs(args):
+    queue_name, steps = load_steps(args)  # Checked here so a typo fails now, not on every node
+    if steps is None:
+        return 1
+    files = expand_files(args.files)
+    if not files:
+        print("No .blend files matched")
+        return 1
+    # Workers find the scripts again in their own library, by path relative to
+    # the same-named root or else by name
+    items = read_queue(queue_path(args.queue))
+    jobs = [dict(job, queue=queue_name, items=items) for job in build_jobs(args, files)]
+    ids = JobSpool(args.spool).submit(jobs)
+    print(f"Submitted {len(ids)} jobs for queue '{queue_name}' to {args.spool}")
+    return 0
+
+
+def spool_work(args):
+    """Claim spool jobs one at a time and run them in this Blender; with -j N,
+    start N background Blenders doing so instead."""
+    if args.jobs and args.jobs > 1:
+        command = [blender_binary(args), "-b", "--python-exit-code", "1", "-P", BATCH_SCRIPT, "--",
+                   "--spool", args.spool, "--work", "--poll", str(args.poll)]
+        for root in args.root:
+            command += ["--root", root]
+        if args.exit_when_empty:
+            command.append("--exit-when-empty")
+        processes = [subprocess.Popen(command) for _ in range(args.jobs)]
+        return max(process.wait() for process in processes)
+
+    spool = JobSpool(args.spool)
+    spool.ensure()
+    worker = worker_name()
+    print(f"Worker {worker} watching {args.spool}")
+    failed = 0
+    while True:
+        recovered = spool.requeue_stale()
+        if recovered:
+            print(f"Recovered {recovered} jobs from workers that stopped responding")
+        claim = spool.claim(worker)
+        if claim is None:
+            if args.exit_when_empty:
+                return 1 if failed else 0
+            time.sleep(args.poll)
+            continue
+        job, claimed = claim
+        steps, missing = resolve_queue(job["items"], args.root)
+        if missing:
+            result = {"blend": job["blend"], "ok": False, "saved": False, "duration": 0.0, "steps": [],
+                      "error": f"Could not find scripts: {', '.join(missing)}"}
+        else:
+            with heartbeat(claimed):
+                result = run_job(dict(job, steps=steps), lambda: still_claimed(claimed))
+        result["worker"] = worker
+        if result.get("reclaimed"):
+            # Another worker has the job now and reports it; a beat was missed,
+            # most likely an operator holding the GIL past STALE_AFTER
+            print(f"{job['id']} {os.path.basename(job['blend'])} handed to another worker meanwhile; not saved")
+            continue
+        spool.complete(job, claimed, result)
+        failed += not result["ok"]
+        status = "ok" if result["ok"] else f"FAILED: {result['error']}"
+        print(f"{job['id']} {os.path.basename(job['blend'])} {result['duration']:.1f}s {status}")
+
+
+def spool_status(args):
+    spool = JobSpool(args.spool)
+    counts = spool.counts()
+    print(", ".join(f"{count} {state}" for state, count in counts.items()))
+    if not args.report:
+        return 0
+    jobs = spool.finished()
+    if not jobs:
+        print("No finished jobs to report")
+        return 0
+    started = min(job["submitted"] for job in jobs)
+    duration = max(job["finished"] for job in jobs) - started
+    workers = len({job["result"].get("worker") for job in jobs})
+    queues = sorted({job.get("queue", "") for job in jobs})
+    return write_report(args, "+".join(queues), [], started, duration, workers, [job["result"] for job in jobs])
+
+
+def main(argv):
+    args = parse_args(argv)
+    if args.worker:
+        return worker_main(args.worker)
+    if args.submit:
+        return submit_jobs(args)
+    if args.work:
+        return spool_work(args)
+    if args.status:
+        return spool_status(args)
+    return run_batch(args)
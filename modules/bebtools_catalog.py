@@ -0,0 +1,262 @@
+import os
+import json
+import time
+import threading
+from collections import namedtuple
+
+ADDON_DIR = os.path.join(os.path.dirname(__file__), "..")
+CACHE_DIR = os.path.join(ADDON_DIR, "cache")
+
+# Directories modified this close to a scan are rescanned next time, since a
+# coarse filesystem mtime (FAT, SMB, some NFS mounts) can hide a second change.
+# The other caches keyed on mtime (listings, code, metadata, instructions)
+# don't trust a stamp this fresh either
+RACY_WINDOW_NS = 2_000_000_000
+
+CatalogEntry = namedtuple("CatalogEntry", "name path is_folder folder mtime size has_txt")
+
+
+def is_script_file(filename):
+    return filename.endswith(".py") and not filename.startswith("__")
+
+
+class ScriptCatalog:
+    """Persistent index of a scripts folder, revalidated per directory by mtime."""
+
+    def __init__(self, root, cache_path):
+        self.root = root
+        self.cache_path = cache_path
+        self.dirs = {}
+        self.dirty = False
+        self.loaded = False
+        self.version = 0  # Bumped whenever a directory record changes
+        self.lock = threading.RLock()
+
+    def load(self):
+        with self.lock:
+            self.loaded = True
+            try:
+                with open(self.cache_path, "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return
+            if data.get("root") == os.path.abspath(self.root):
+                self.dirs = data.get("dirs", {})
+                self.version += 1
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"  # Batch workers may save at the same time
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump({"root": os.path.abspath(self.root), "dirs": self.dirs}, f)
+                os.replace(tmp_path, self.cache_path)
+                self.dirty = False
+            except OSError as e:
+                print(f"Could not save script catalog: {e}")
+
+    def rel_dir(self, directory):
+        """Catalog key for a directory, or None if it lies outside the root."""
+        try:
+            rel = os.path.relpath(directory, self.root)
+        except ValueError:
+            return None
+        if rel == os.curdir:
+            return ""
+        if rel == os.pardir or rel.startswith(os.pardir + os.sep):
+            return None
+        return rel
+
+    def full_path(self, rel):
+        return os.path.join(self.root, rel) if rel else self.root
+
+    def scan_dir(self, rel):
+        """List one directory from disk into a catalog record."""
+        directory = self.full_path(rel)
+        scanned = time.time_ns()
+        folders = []
+        scripts = []
+        with os.scandir(directory) as it:
+            entries = list(it)
+        names = {entry.name for entry in entries}
+        for entry in entries:
+            if entry.is_dir():
+                folders.append(entry.name)
+            elif is_script_file(entry.name):
+                st = entry.stat()
+                scripts.append({
+                    "name": entry.name[:-3],
+                    "file": entry.name,
+                    "mtime": st.st_mtime_ns,
+                    "size": st.st_size,
+                    "has_txt": entry.name[:-3] + ".txt" in names,
+                })
+        folders.sort()
+        scripts.sort(key=lambda s: s["name"])
+        return {"mtime": os.stat(directory).st_mtime_ns, "scanned": scanned, "folders": folders, "scripts": scripts}
+
+    def is_stale(self, rel, record):
+        try:
+            mtime = os.stat(self.full_path(rel)).st_mtime_ns
+        except OSError:
+            return True
+        if record is None or record["mtime"] != mtime:
+            return True
+        return mtime >= record["scanned"] - RACY_WINDOW_NS
+
+    def drop(self, rel):
+        prefix = rel + os.sep if rel else ""
+        for key in [k for k in self.dirs if k == rel or k.startswith(prefix)]:
+            del self.dirs[key]
+        self.dirty = True
+        self.version += 1
+
+    def probe(self, rel):
+        """Filesystem half of revalidate(): (the cached record the probe started
+        from, a fresh record if rel is stale or the cached one if not, or None if
+        it is gone). Runs without the lock, on worker threads too."""
+        old = self.dirs.get(rel)
+        if not self.is_stale(rel, old):
+            return old, old
+        try:
+            return old, self.scan_dir(rel)
+        except OSError:
+            return old, None
+
+    def apply(self, rel, probed):
+        """Store what probe() found for rel; call with the lock held. Returns
+        the record or None."""
+        start, record = probed
+        old = self.dirs.get(rel)
+        if old is not start:
+            return old  # Updated by another thread since the probe; keep that
+        if record is old:
+            return record
+        if record is None:
+            self.drop(rel)
+            return None
+        if old:
+            # Subfolders that disappeared take their cached subtree with them
+            for name in set(old["folders"]) - set(record["folders"]):
+                self.drop(os.path.join(rel, name))
+        self.dirs[rel] = record
+        self.dirty = True
+        self.version += 1
+        return record
+
+    def revalidate(self, rel):
+        """Rescan one directory if its mtime changed. Returns its record or None."""
+        probed = self.probe(rel)
+        with self.lock:
+            return self.apply(rel, probed)
+
+    def refresh(self, directory=None, recursive=True, executor=None):
+        """Revalidate a directory (and by default its subtree) against the disk.
+
+        With an executor, each level of the tree is probed in parallel, which
+        hides the per-directory round trip of a network share. The lock is only
+        held to store each level's results, so a slow scan in the background
+        doesn't hold up listings on the main thread.
+        """
+        with self.lock:
+            if not self.loaded:
+                self.load()
+        start = self.rel_dir(directory) if directory else ""
+        if start is None:
+            return
+        level = [start]
+        while level:
+            probed = list(executor.map(self.probe, level) if executor else map(self.probe, level))
+            next_level = []
+            with self.lock:
+                for rel, found in zip(level, probed):
+                    record = self.apply(rel, found)
+                    if record and recursive:
+                        next_level.extend(os.path.join(rel, name) for name in record["folders"])
+            level = next_level
+
+    def entries(self, rel, record):
+        folder_path = self.full_path(rel)
+        folders = [
+            CatalogEntry(name, os.path.join(folder_path, name), True, rel, 0, 0, False)
+            for name in record["folders"]
+        ]
+        scripts = [
+            CatalogEntry(s["name"], os.path.join(folder_path, s["file"]), False, rel, s["mtime"], s["size"], s["has_txt"])
+            for s in record["scripts"]
+        ]
+        return folders, scripts
+
+    def find(self, rel_path):
+        """Entry of the script at rel_path below the root, or None. Only its own
+        folder is revalidated, so this costs one stat while nothing changed."""
+        with self.lock:
+            if not self.loaded:
+                self.load()
+        rel, filename = os.path.split(os.path.normpath(rel_path))
+        record = self.revalidate(rel)
+        if record is None:
+            return None
+        _, scripts = self.entries(rel, record)
+        return next((entry for entry in scripts if os.path.basename(entry.path) == filename), None)
+
+    def list_dir(self, directory):
+        """Return (folders, scripts) of a single directory, each sorted by name."""
+        rel = self.rel_dir(directory)
+        if rel is None:
+            # Outside the library: list it directly without caching
+            scratch = ScriptCatalog(directory, None)
+            try:
+                return scratch.entries("", scratch.scan_dir(""))
+            except OSError:
+                return [], []
+        self.refresh(directory, recursive=False)
+        with self.lock:
+            record = self.dirs.get(rel)
+            if record is None:
+                return [], []
+            return self.entries(rel, record)
+
+    def walk(self, directory=None, recursive=True, refresh=True):
+        """Return every script entry below a directory, folder by folder in name order."""
+        if refresh:
+            self.refresh(directory, recursive=recursive)
+        with self.lock:
+            if not self.loaded:
+                self.load()
+            start = self.rel_dir(directory) if directory else ""
+            if start is None:
+                return []
+            result = []
+            pending = [start]
+            while pending:
+                rel = pending.pop()
+                record = self.dirs.get(rel)
+                if record is None:
+                    continue
+                folders, scripts = self.entries(rel, record)
+                result.extend(scripts)
+                if recursive:
+                    pending.extend(os.path.join(rel, name) for name in reversed(record["folders"]))
+            return result
+
+    def rows(self):
+        """Every cached folder and script as (name, path, is_folder, parent dir),
+        grouped so each directory's entries are contiguous and in display order."""
+        with self.lock:
+            result = []
+            for rel in sorted(self.dirs):
+                folders, scripts = self.entries(rel, self.dirs[rel])
+                parent = self.full_path(rel)
+                result.extend((entry.name, entry.path, entry.is_folder, parent) for entry in folders + scripts)
+            return result
+
+    def scripts_by_name(self):
+        """Map script names to entries; on duplicate names the first one walked wins."""
+        by_name = {}
+        for entry in self.walk():
+            by_name.setdefault(entry.name, entry)
+        return by_name
@@ -1,18 +1,27 @@
 import bpy
+import os
+import time
 from bpy.types import Operator
-from bpy.props import StringProperty
-from .bebtools_utils import SCRIPTS_DIR, update_info_text, get_scripts
+from bpy.props import StringProperty, EnumProperty, BoolProperty
+from .bebtools_utils import (
+    update_info_text, get_scripts, load_scripts_async, library, apply_library_roots, reload_library_roots, ADDON_ID,
+    run_script, code_cache, history, queue_run, tag_redraw_view3d, start_ops_trace, finish_ops_trace, begin_run, push_undo,
+    restore_point, journal, save_checkpoint, queue_params,
+    incremental, step_hash, start_incremental, incremental_state, stop_incremental, save_snapshot,
+)
+from .bebtools_incremental import queue_identity
 
 class BEBTOOLS_OT_InitScripts(Operator):
     bl_idname = "bebtools.init_scripts"
     bl_label = "Initialize Script List"
     bl_description = "Populate the script list"
-    directory: StringProperty(default=SCRIPTS_DIR)
+    directory: StringProperty(default="")
 
     def execute(self, context):
         wm = context.window_manager
-        load_dir = self.directory if self.directory else SCRIPTS_DIR
+        load_dir = self.directory if self.directory else library.top
         print(f"Initializing with directory: {load_dir}")
+        library.refresh()  # Pick up changes anywhere in the library, not just this folder
         get_scripts(load_dir)
         wm.bebtools_active_index = -1
         wm.bebtools_current_dir = load_dir  # Set current dir on init
@@ -23,7 +32,7 @@ class BEBTOOLS_OT_Run(Operator):
     bl_idname = "bebtools.run"
     bl_label = "▶ Run"
     bl_description = "Run the selected script"
-    bl_options = {'REGISTER', 'UNDO'}
+    bl_options = {'REGISTER'}  # Undo steps are pushed by push_undo() per the undo mode
 
     def execute(self, context):
         wm = context.window_manager
@@ -33,12 +42,21 @@ class BEBTOOLS_OT_Run(Operator):
                 self.report({'WARNING'}, "Select a script to run")
                 return {'CANCELLED'}
             script_path = script_item.path
+            if not begin_run(context):
+                self.report({'ERROR'}, "Could not save a restore point; nothing was run")
+                return {'CANCELLED'}
+            tracing = start_ops_trace(context, script_item.name)
             try:
-                with open(script_path, "r") as f:
-                    exec(f.read(), globals())
+                warnings = run_script(script_path, globals(), context)
                 self.report({'INFO'}, f"Executed script: {script_item.name}")
+                for warning in warnings:
+                    self.report({'WARNING'}, f"{script_item.name} {warning}")
             except Exception as e:
                 self.report({'ERROR'}, f"Error running {script_item.name}: {str(e)}")
+            if tracing:
+                finish_ops_trace(self)
+            push_undo(context, script_item.name)
+            code_cache.save_runs()
         else:
             self.report({'WARNING'}, "No script selected")
         return {'FINISHED'}
@@ -47,10 +65,20 @@ class BEBTOOLS_OT_Run(Operator):
 class BEBTOOLS_OT_MultiRun(Operator):
     bl_idname = "bebtools.multi_run"
     bl_label = "Run All"
-    bl_description = "Run all queued scripts in order"
-    bl_options = {'REGISTER', 'UNDO'}
+    bl_description = "Run all queued scripts in order (Esc to stop between scripts)"
+    bl_options = {'REGISTER'}  # Undo steps are pushed by push_undo() per the undo mode
+
+    # Carry on with the run in the journal instead of starting the queue afresh
+    resume: BoolProperty(default=False, options={'HIDDEN', 'SKIP_SAVE'})
+
+    _timer = None
 
     def invoke(self, context, event):
+        if queue_run["running"]:
+            self.report({'WARNING'}, "The queue is already running")
+            return {'CANCELLED'}
+        if self.resume:
+            return self.execute(context)
         if context.window_manager.bebtools_queue:
             return context.window_manager.invoke_confirm(self, event)
         else:
@@ -58,15 +86,357 @@ class BEBTOOLS_OT_MultiRun(Operator):
             return {'CANCELLED'}
 
     def execute(self, context):
+        # One script per timer tick, so Blender redraws and reads Esc between scripts
         wm = context.window_manager
-        for item in wm.bebtools_queue:
-            script_path = item.path
+        if self.resume and not journal.resumable():
+            self.report({'WARNING'}, "No unfinished queue run to resume")
+            return {'CANCELLED'}
+        if not begin_run(context):
+            self.report({'ERROR'}, "Could not save a restore point; the queue was not run")
+            return {'CANCELLED'}
+        if self.resume:
+            self.items = [tuple(item) for item in journal.data["items"]]
+        else:
+            self.items = [(item.name, item.path, queue_params(item)) for item in wm.bebtools_queue]
+            journal.begin(self.items, bpy.data.filepath)
+        self.incremental = wm.bebtools_incremental
+        if self.incremental:
+            self.queue = queue_identity(path for _, path, _ in self.items)
+            self.state = start_incremental()
+            if not self.resume:
+                result = self.skip_unchanged()
+                if result:
+                    return result
+            save_snapshot(self.state)  # A rerun changing the next script restarts from here
+        first = journal.next_index
+        self.snapshot_steps = wm.bebtools_snapshot_steps
+        self.last_snapshot = first
+        self.failed = sum(1 for step in journal.data["steps"] if step["error"])
+        self.flagged = []
+        expected = history.expected_durations([path for _, path, _ in self.items])
+        queue_run.update(
+            running=True, done=first, first=first, total=len(self.items), current="", started=time.time(),
+            expected=[expected.get(path) for _, path, _ in self.items], cancelled=False,
+        )
+        # Checkpoint the starting state too, so even a crash in the first few scripts can be resumed
+        self.checkpoint_steps = wm.bebtools_checkpoint_steps
+        self.checkpoint_seconds = wm.bebtools_checkpoint_minutes * 60
+        self.last_checkpoint = (first, time.time())
+        if (self.checkpoint_steps or self.checkpoint_seconds) and not save_checkpoint(first):
+            self.report({'WARNING'}, "Could not save a queue checkpoint; this run can't be resumed after a crash")
+        self.tracing = start_ops_trace(context, "Queue")
+        self._timer = wm.event_timer_add(0.01, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC' or queue_run["cancelled"]:
+            self.finish(context)
+            self.report({'WARNING'}, f"Queue stopped after {queue_run['done']} of {len(self.items)} script(s)")
+            return {'CANCELLED'}
+        if event.type != 'TIMER' or event.timer is not self._timer:
+            return {'PASS_THROUGH'}
+        try:
+            return self.run_next(context)
+        except Exception as e:
+            # Journal, checkpoint or incremental bookkeeping failed; don't leave the queue marked running
+            if self._timer is not None:
+                self.finish(context)
+            self.report({'ERROR'}, f"Queue stopped after {queue_run['done']} of {len(self.items)} script(s): {str(e)}")
+            return {'CANCELLED'}
+
+    def run_next(self, context):
+        done = queue_run["done"]
+        if done >= len(self.items):
+            journal.finish()
+            self.finish(context)
+            original = journal.data["original"]
+            if self.resume and bpy.data.filepath != original:
+                # Resumed in a reopened checkpoint or snapshot, which lives in the add-on's cache
+                self.report({'WARNING'}, f"Ran in a copy of the scene from the add-on's cache. Use Save As to keep the result{' in ' + original if original else ''}")
+            if self.failed:
+                self.report({'WARNING'}, f"Ran {len(self.items)} script(s), {self.failed} failed")
+            elif self.flagged:
+                flagged = ", ".join(dict.fromkeys(self.flagged))
+                self.report({'WARNING'}, f"Ran {len(self.items)} script(s); check memory use of: {flagged}")
+            else:
+                self.report({'INFO'}, f"Ran {len(self.items)} script(s)")
+            return {'FINISHED'}
+        name, path, params = self.items[done]
+        queue_run["current"] = name
+        clock = time.perf_counter()
+        error = ""
+        try:
+            warnings = run_script(path, globals(), context, params)
+            self.report({'INFO'}, f"Executed script: {name}")
+            for warning in warnings:
+                self.flagged.append(name)
+                self.report({'WARNING'}, f"{name} {warning}")
+        except Exception as e:
+            self.failed += 1
+            error = str(e) or type(e).__name__
+            self.report({'ERROR'}, f"Error running {name}: {str(e)}")
+        journal.step(name, time.perf_counter() - clock, error)
+        if self.incremental:
+            self.record_step(context, done + 1, path, params, error)
+        if context.window_manager.bebtools_undo_mode == 'SCRIPT':
+            push_undo(context, name)
+        queue_run["done"] = done + 1
+        self.checkpoint_if_due(done + 1)
+        tag_redraw_view3d()
+        return {'RUNNING_MODAL'}
+
+    def skip_unchanged(self):
+        """Mark the leading scripts whose input scene and code are unchanged since
+        an earlier run as done, reopening the snapshot of their result if that
+        isn't the scene at hand. Returns the operator result if nothing is left
+        to run from here."""
+        first, reopen, known = incremental.plan(self.state, [(step_hash(path), params) for _, path, params in self.items], self.queue)
+        if not known:
+            self.report({'WARNING'}, "The start of this scene's earlier run is no longer cached; running every script on it")
+        for name, _, _ in self.items[:first]:
+            journal.step(name, 0.0, skipped=True)
+        if reopen:
+            stop_incremental()
+            path = incremental.snapshot_path(reopen)
+            original = journal.data["original"]
             try:
-                with open(script_path, "r") as f:
-                    exec(f.read(), globals())
-                self.report({'INFO'}, f"Executed script: {item.name}")
-            except Exception as e:
-                self.report({'ERROR'}, f"Error running {item.name}: {str(e)}")
+                bpy.ops.wm.open_mainfile(filepath=path)
+            except RuntimeError as e:
+                journal.rewind(0, bpy.data.filepath)
+                self.report({'ERROR'}, f"Error opening incremental snapshot: {str(e)}")
+                return {'CANCELLED'}
+            journal.rewind(first, path)
+            os.utime(path)
+            if first >= len(self.items):
+                journal.finish()
+                # The snapshot lives in the add-on's cache and may be pruned
+                self.report({'WARNING'}, f"Queue unchanged; reopened its last result. Use Save As to keep it{' in ' + original if original else ''}")
+                return {'FINISHED'}
+            print(f"Skipped {first} unchanged script(s); resuming from {path}")
+            bpy.app.timers.register(resume_queue_timer, first_interval=0.1)
+            return {'FINISHED'}
+        if first >= len(self.items):
+            journal.finish()
+            stop_incremental()
+            self.report({'INFO'}, "Nothing changed since the last run; every script was skipped")
+            return {'FINISHED'}
+        if first:
+            self.report({'INFO'}, f"Skipped {first} unchanged script(s)")
+        return None
+
+    def record_step(self, context, index, path, params, error):
+        after = incremental_state(context)
+        script_hash = step_hash(path)
+        if not error and script_hash is not None:
+            incremental.record(self.state, script_hash, params, after, self.queue)
+            # Snapshots are full saves, so only every few scripts, like checkpoints
+            if self.snapshot_steps and index - self.last_snapshot >= self.snapshot_steps and index < len(self.items):
+                save_snapshot(after)
+                self.last_snapshot = index
+        self.state = after
+
+    def checkpoint_if_due(self, index):
+        if index >= len(self.items):
+            return
+        last_index, last_time = self.last_checkpoint
+        if ((self.checkpoint_steps and index - last_index >= self.checkpoint_steps)
+                or (self.checkpoint_seconds and time.time() - last_time >= self.checkpoint_seconds)):
+            if not save_checkpoint(index):
+                self.report({'WARNING'}, "Could not save a queue checkpoint")
+            self.last_checkpoint = (index, time.time())
+
+    def finish(self, context):
+        context.window_manager.event_timer_remove(self._timer)
+        self._timer = None
+        queue_run.update(running=False, current="", cancelled=False)
+        if context.window_manager.bebtools_undo_mode == 'QUEUE' and queue_run["done"]:
+            push_undo(context, "Run queue")
+        if self.tracing:
+            finish_ops_trace(self)
+        if self.incremental:
+            stop_incremental()
+        code_cache.save_runs()
+        tag_redraw_view3d()
+
+class BEBTOOLS_OT_CancelQueue(Operator):
+    bl_idname = "bebtools.cancel_queue"
+    bl_label = "Stop Queue"
+    bl_description = "Stop the running queue after the current script"
+
+    def execute(self, context):
+        queue_run["cancelled"] = True
+        return {'FINISHED'}
+
+
+def resume_queue_timer():
+    # Loading the checkpoint ended the operator that asked for it; start the run
+    # again from here, in a window of the freshly loaded file
+    wm = bpy.context.window_manager
+    if wm.windows:
+        with bpy.context.temp_override(window=wm.windows[0]):
+            bpy.ops.bebtools.multi_run('INVOKE_DEFAULT', resume=True)
+    return None
+
+class BEBTOOLS_OT_ResumeQueue(Operator):
+    bl_idname = "bebtools.resume_queue"
+    bl_label = "Resume Queue"
+    bl_description = ("Continue the last unfinished queue run at its first incomplete script, "
+                      "reopening its latest checkpoint if Blender was restarted since")
+
+    def invoke(self, context, event):
+        if queue_run["running"]:
+            self.report({'WARNING'}, "The queue is already running")
+            return {'CANCELLED'}
+        if not journal.resumable():
+            self.report({'WARNING'}, "No unfinished queue run to resume")
+            return {'CANCELLED'}
+        return context.window_manager.invoke_confirm(self, event)
+
+    def execute(self, context):
+        point = journal.resume_point(bpy.data.filepath)
+        if point is None:
+            self.report({'ERROR'}, "That run has no checkpoint to resume from; turn on queue checkpoints for long runs")
+            return {'CANCELLED'}
+        index, checkpoint = point
+        if checkpoint is None:
+            journal.rewind(index, bpy.data.filepath)
+            bpy.ops.bebtools.multi_run('INVOKE_DEFAULT', resume=True)
+            return {'FINISHED'}
+        try:
+            bpy.ops.wm.open_mainfile(filepath=checkpoint)
+        except RuntimeError as e:
+            self.report({'ERROR'}, f"Error opening checkpoint: {str(e)}")
+            return {'CANCELLED'}
+        journal.rewind(index, checkpoint)
+        print(f"Resuming queue at script {index + 1} of {len(journal.data['items'])} from {checkpoint}")
+        bpy.app.timers.register(resume_queue_timer, first_interval=0.1)
+        return {'FINISHED'}
+
+class BEBTOOLS_OT_RevertRestorePoint(Operator):
+    bl_idname = "bebtools.revert_restore_point"
+    bl_label = "Revert to Restore Point"
+    bl_description = "Reopen the copy of the scene saved before the last fast (no undo) run"
+
+    def invoke(self, context, event):
+        if not restore_point["path"] or not os.path.exists(restore_point["path"]):
+            self.report({'WARNING'}, "No restore point to revert to")
+            return {'CANCELLED'}
+        return context.window_manager.invoke_confirm(self, event)
+
+    def execute(self, context):
+        path = restore_point["path"]
+        source = restore_point["source"]
+        try:
+            bpy.ops.wm.open_mainfile(filepath=path)
+        except RuntimeError as e:
+            self.report({'ERROR'}, f"Error opening restore point: {str(e)}")
+            return {'CANCELLED'}
+        if source:
+            # The reopened copy lives in the temp folder; saving should go back to the original
+            self.report({'WARNING'}, f"Reverted. Use Save As to write it back to {source}")
+        else:
+            self.report({'INFO'}, "Reverted to the restore point")
+        return {'FINISHED'}
+
+class BEBTOOLS_OT_ExportProfile(Operator):
+    bl_idname = "bebtools.export_profile"
+    bl_label = "Export Profile"
+    bl_description = "Save the latest profile of this script for snakeviz/pstats or speedscope"
+    bl_options = {'INTERNAL'}
+
+    script_path: StringProperty()
+    filepath: StringProperty(subtype='FILE_PATH')
+    format: EnumProperty(
+        name="Format",
+        items=[
+            ('PSTATS', "pstats", "Python .pstats file (snakeviz, pstats, gprof2dot)"),
+            ('SPEEDSCOPE', "Speedscope", "Speedscope JSON flame graph"),
+        ],
+        default='SPEEDSCOPE',
+    )
+
+    def invoke(self, context, event):
+        name = os.path.splitext(os.path.basename(self.script_path))[0]
+        self.filepath = name + (".speedscope.json" if self.format == 'SPEEDSCOPE' else ".pstats")
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        try:
+            exported = history.export_profile(self.script_path, self.filepath, speedscope=self.format == 'SPEEDSCOPE')
+        except OSError as e:
+            self.report({'ERROR'}, f"Error exporting profile: {str(e)}")
+            return {'CANCELLED'}
+        if not exported:
+            self.report({'WARNING'}, "This script hasn't been profiled yet; turn on Profile Runs and run it")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Exported profile to {self.filepath}")
+        return {'FINISHED'}
+
+class BEBTOOLS_OT_AddLibraryRoot(Operator):
+    bl_idname = "bebtools.add_library_root"
+    bl_label = "Add Library"
+    bl_description = "Add a folder of scripts to the library"
+    bl_options = {'INTERNAL'}
+
+    directory: StringProperty(subtype='DIR_PATH')
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        prefs = context.preferences.addons[ADDON_ID].preferences
+        if not self.directory:
+            self.report({'WARNING'}, "Please pick a folder!")
+            return {'CANCELLED'}
+        other = library.overlapping(self.directory)
+        if other:
+            # Nested roots would list the scripts they share twice
+            self.report({'WARNING'}, f"That folder overlaps the library folder {other}")
+            return {'CANCELLED'}
+        root = prefs.library_roots.add()
+        root.name = os.path.basename(os.path.normpath(self.directory))
+        root.path = self.directory
+        prefs.library_roots_index = len(prefs.library_roots) - 1
+        self.report({'INFO'}, f"Added library '{root.name}'")
+        return {'FINISHED'}
+
+class BEBTOOLS_OT_RemoveLibraryRoot(Operator):
+    bl_idname = "bebtools.remove_library_root"
+    bl_label = "Remove Library"
+    bl_description = "Remove the selected folder from the library (files are kept)"
+    bl_options = {'INTERNAL'}
+
+    def execute(self, context):
+        prefs = context.preferences.addons[ADDON_ID].preferences
+        index = prefs.library_roots_index
+        if index < 0 or index >= len(prefs.library_roots):
+            self.report({'WARNING'}, "No library selected")
+            return {'CANCELLED'}
+        prefs.library_roots.remove(index)
+        prefs.library_roots_index = min(index, len(prefs.library_roots) - 1)
+        reload_library_roots()
+        return {'FINISHED'}
+
+class BEBTOOLS_OT_MoveLibraryRoot(Operator):
+    bl_idname = "bebtools.move_library_root"
+    bl_label = "Move Library"
+    bl_description = "Change the precedence of the selected library; scripts in higher libraries win name clashes"
+    bl_options = {'INTERNAL'}
+
+    direction: EnumProperty(items=[('UP', "Up", ""), ('DOWN', "Down", "")])
+
+    def execute(self, context):
+        prefs = context.preferences.addons[ADDON_ID].preferences
+        index = prefs.library_roots_index
+        target = index - 1 if self.direction == 'UP' else index + 1
+        if index < 0 or target < 0 or target >= len(prefs.library_roots):
+            return {'CANCELLED'}
+        prefs.library_roots.move(index, target)
+        prefs.library_roots_index = target
+        reload_library_roots()
         return {'FINISHED'}
 
 
@@ -74,9 +444,19 @@ classes = (
     BEBTOOLS_OT_InitScripts,
     BEBTOOLS_OT_Run,
     BEBTOOLS_OT_MultiRun,
+    BEBTOOLS_OT_CancelQueue,
+    BEBTOOLS_OT_ExportProfile,
+    BEBTOOLS_OT_ResumeQueue,
+    BEBTOOLS_OT_RevertRestorePoint,
+    BEBTOOLS_OT_AddLibraryRoot,
+    BEBTOOLS_OT_RemoveLibraryRoot,
+    BEBTOOLS_OT_MoveLibraryRoot,
 )
 
 
 def init_scripts_timer():
-    bpy.ops.bebtools.init_scripts('INVOKE_DEFAULT')
+    # Scan off the main thread so a slow network share doesn't freeze startup
+    apply_library_roots()
+    load_scripts_async()
+    journal.load()  # An unfinished run from before a crash offers Resume
     return None
\ No newline at end of file
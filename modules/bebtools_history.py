@@ -0,0 +1,208 @@
+import os
+import json
+import marshal
+import sqlite3
+
+# Number of recent successful runs averaged into a script's expected duration
+HISTORY_WINDOW = 10
+
+# Call paths deeper than this, or lighter than this share of the run, are
+# left out when unfolding a profile into speedscope stacks
+SPEEDSCOPE_MAX_DEPTH = 64
+SPEEDSCOPE_MIN_SHARE = 0.0005
+
+
+def function_label(func):
+    filename, line, name = func
+    if filename == "~":
+        return name  # Built-in
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def hotspots(stats, count=3):
+    """(label, own seconds, calls) of the functions with the most time of their own."""
+    ranked = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)
+    return [(function_label(func), value[2], value[1]) for func, value in ranked[:count]]
+
+
+def speedscope_profile(stats, name):
+    """A speedscope sampled profile unfolded from a pstats call graph.
+
+    cProfile only keeps caller/callee totals, so each function's children are
+    split between its callers in proportion to the time each caller spent in it.
+    """
+    callees = {}
+    for func, (cc, nc, tt, ct, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge))
+    roots = [func for func, value in stats.items() if not value[4]]
+    total = sum(stats[func][3] for func in roots) or 1e-9
+    frames = []
+    frame_index = {}
+    samples = []
+    weights = []
+
+    def frame(func):
+        if func not in frame_index:
+            frame_index[func] = len(frames)
+            filename, line, label = func
+            frames.append({"name": label, "file": filename, "line": line})
+        return frame_index[func]
+
+    def unfold(func, stack, own, scale):
+        stack = stack + [frame(func)]
+        children = []
+        for callee, edge in callees.get(func, ()):
+            edge_tt, edge_ct = edge[2] * scale, edge[3] * scale
+            if frame_index.get(callee) in stack:
+                # Recursion: the callee's further calls are already among this
+                # frame's children, only the own time of the inner calls is left
+                own += edge_tt
+            elif len(stack) < SPEEDSCOPE_MAX_DEPTH and edge_ct >= total * SPEEDSCOPE_MIN_SHARE:
+                callee_ct = stats[callee][3] or 1e-9
+                children.append((callee, edge_tt, scale * edge[3] / callee_ct))
+        if own > 0:
+            samples.append(stack)
+            weights.append(own)
+        for callee, callee_own, callee_scale in children:
+            unfold(callee, stack, callee_own, callee_scale)
+
+    for func in roots:
+        unfold(func, [], stats[func][2], 1.0)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }],
+        "name": name,
+        "exporter": "Beb.Tools",
+    }
+
+
+class RunHistory:
+    """Wall time of every script run, and the cProfile data of profiled ones,
+    kept in a local SQLite database."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = None
+        self.version = 0  # Bumped on every record, for callers caching summaries
+
+    def connect(self):
+        if self.conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self.conn = sqlite3.connect(self.db_path)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "id INTEGER PRIMARY KEY, path TEXT NOT NULL, started REAL NOT NULL, "
+                "duration REAL NOT NULL, ok INTEGER NOT NULL, error TEXT)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS runs_by_path ON runs (path, started)")
+            # pstats data (the same marshalled dict a .pstats file holds) of profiled runs
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS profiles (run_id INTEGER PRIMARY KEY REFERENCES runs (id), stats BLOB NOT NULL)"
+            )
+            # Python memory kept and peaked, and bpy.data count changes, of tracked runs
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS memory (run_id INTEGER PRIMARY KEY REFERENCES runs (id), "
+                "python_bytes INTEGER NOT NULL, peak_bytes INTEGER NOT NULL, datablocks TEXT NOT NULL, flags TEXT NOT NULL)"
+            )
+        return self.conn
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def record(self, path, started, duration, error="", stats=None, memory=None):
+        """Store one run with its pstats data and memory deltas, if captured.
+        Returns the run id, or None if the database is unavailable."""
+        try:
+            conn = self.connect()
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO runs (path, started, duration, ok, error) VALUES (?, ?, ?, ?, ?)",
+                    (path, started, duration, 0 if error else 1, error),
+                )
+                if stats is not None:
+                    conn.execute(
+                        "INSERT INTO profiles (run_id, stats) VALUES (?, ?)",
+                        (cursor.lastrowid, marshal.dumps(stats)),
+                    )
+                if memory is not None:
+                    conn.execute(
+                        "INSERT INTO memory (run_id, python_bytes, peak_bytes, datablocks, flags) VALUES (?, ?, ?, ?, ?)",
+                        (cursor.lastrowid, memory["python_bytes"], memory["peak_bytes"],
+                         json.dumps(memory["datablocks"]), json.dumps(memory["flags"])),
+                    )
+            self.version += 1
+            return cursor.lastrowid
+        except sqlite3.Error as e:
+            print(f"Could not record run of {path}: {e}")
+            return None
+
+    def expected_durations(self, paths, window=HISTORY_WINDOW):
+        """Mean of the recent successful run times of each path that has any."""
+        result = {}
+        try:
+            conn = self.connect()
+            for path in set(paths):
+                row = conn.execute(
+                    "SELECT AVG(duration) FROM (SELECT duration FROM runs "
+                    "WHERE path = ? AND ok = 1 ORDER BY started DESC LIMIT ?)",
+                    (path, window),
+                ).fetchone()
+                if row[0] is not None:
+                    result[path] = row[0]
+        except sqlite3.Error as e:
+            print(f"Could not read run history: {e}")
+        return result
+
+    def slowest(self, count=5, window=HISTORY_WINDOW):
+        """(path, mean seconds, runs) of the scripts slowest on average recently."""
+        try:
+            return self.connect().execute(
+                "SELECT path, AVG(duration), COUNT(*) FROM ("
+                "SELECT path, duration, ROW_NUMBER() OVER (PARTITION BY path ORDER BY started DESC) AS n "
+                "FROM runs WHERE ok = 1) WHERE n <= ? GROUP BY path ORDER BY AVG(duration) DESC LIMIT ?",
+                (window, count),
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Could not read run history: {e}")
+            return []
+
+    def latest_profile(self, path):
+        """pstats data of the most recent profiled run of a script, or None."""
+        try:
+            row = self.connect().execute(
+                "SELECT profiles.stats FROM profiles JOIN runs ON runs.id = profiles.run_id "
+                "WHERE runs.path = ? ORDER BY runs.started DESC LIMIT 1",
+                (path,),
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Could not read run history: {e}")
+            return None
+        return marshal.loads(row[0]) if row else None
+
+    def export_profile(self, path, filepath, speedscope=False):
+        """Write the latest profile of a script as .pstats or speedscope JSON.
+        Returns False if the script was never profiled."""
+        stats = self.latest_profile(path)
+        if stats is None:
+            return False
+        if speedscope:
+            with open(filepath, "w") as f:
+                json.dump(speedscope_profile(stats, os.path.basename(path)), f)
+        else:
+            with open(filepath, "wb") as f:
+                marshal.dump(stats, f)  # Exactly what pstats.Stats.dump_stats() writes
+        return True
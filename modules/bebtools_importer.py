@@ -0,0 +1,100 @@
+import io
+import os
+import hashlib
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from .bebtools_metadata import file_hash
+
+# Files brought in by the folder importer; .zip archives are read for them too
+IMPORT_EXTENSIONS = (".py", ".txt")
+
+# Threads writing imported files; they mostly wait on the disk
+IMPORT_WRITERS = 8
+
+
+def zip_sources(archive, bad_zips):
+    """(filename, bytes) of the files in an open ZipFile, read straight out
+    of the archive; nested archives are opened in memory."""
+    for info in archive.infolist():
+        if info.is_dir():
+            continue
+        filename = os.path.basename(info.filename)
+        ext = os.path.splitext(filename)[1].lower()
+        if ext == ".zip":
+            try:
+                with zipfile.ZipFile(io.BytesIO(archive.read(info))) as nested:
+                    yield from zip_sources(nested, bad_zips)
+            except zipfile.BadZipFile:
+                bad_zips.append(filename)
+        elif ext in IMPORT_EXTENSIONS:
+            yield filename, archive.read(info)
+
+
+def folder_sources(folder, bad_zips):
+    """(filename, bytes) of every .py and .txt below a folder and in the .zip
+    files there. Names of archives that can't be read go to bad_zips."""
+    for root, dirs, files in os.walk(folder):
+        for filename in files:
+            path = os.path.join(root, filename)
+            ext = os.path.splitext(filename)[1].lower()
+            if ext == ".zip":
+                try:
+                    with zipfile.ZipFile(path) as archive:
+                        yield from zip_sources(archive, bad_zips)
+                except zipfile.BadZipFile:
+                    bad_zips.append(filename)
+            elif ext in IMPORT_EXTENSIONS:
+                with open(path, "rb") as f:
+                    yield filename, f.read()
+
+
+def plan_import(sources, dest_dir, script_hash=file_hash):
+    """Work out what importing sources into dest_dir has to write.
+
+    Every file lands in dest_dir under its own name, later ones of the same
+    name winning, and each script gets a notes .txt if it has none. Files
+    whose content matches the library's copy are left alone; script_hash
+    gives the hash of an existing .py (the metadata cache knows most of them
+    without reading the file).
+
+    Returns ({dest path: bytes} to write, names of the imported scripts).
+    """
+    incoming = {}
+    for filename, data in sources:
+        incoming[filename] = data
+    scripts = {os.path.splitext(filename)[0] for filename in incoming if filename.lower().endswith(".py")}
+    for name in scripts:
+        notes = f"{name}.txt"
+        if notes not in incoming and not os.path.exists(os.path.join(dest_dir, notes)):
+            incoming[notes] = f"Notes for {name}\n".encode()
+    writes = {}
+    for filename, data in incoming.items():
+        dest_path = os.path.join(dest_dir, filename)
+        try:
+            current = script_hash(dest_path) if filename.lower().endswith(".py") else file_hash(dest_path)
+        except OSError:
+            current = None
+        if current != hashlib.sha1(data).hexdigest():
+            writes[dest_path] = data
+    return writes, scripts
+
+
+def write_file(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_files(writes, workers=IMPORT_WRITERS):
+    """Write {path: bytes} on a thread pool; returns [(path, error)] of the failures."""
+    def write(item):
+        path, data = item
+        try:
+            write_file(path, data)
+        except OSError as e:
+            return path, e
+        return None
+
+    with ThreadPoolExecutor(workers) as pool:
+        return [failure for failure in pool.map(write, writes.items()) if failure]
@@ -0,0 +1,284 @@
+import os
+import json
+import hashlib
+from array import array
+
+# bpy.data collections whose datablocks make up a scene's fingerprint
+FINGERPRINT_COLLECTIONS = (
+    "scenes", "collections", "objects", "meshes", "curves", "materials", "node_groups", "images",
+    "textures", "cameras", "lights", "actions", "worlds",
+)
+
+# RNA properties that change without the data changing
+VOLATILE_PROPS = {
+    "rna_type", "users", "tag", "is_evaluated", "original", "session_uid", "is_runtime_data",
+    "is_library_indirect", "is_missing", "is_embedded_data", "preview", "bindcode", "is_dirty", "has_data",
+}
+
+SIMPLE_TYPES = {"BOOLEAN", "INT", "FLOAT", "STRING", "ENUM"}
+
+# Struct collections hashed along with their datablock
+MEMBER_COLLECTIONS = {
+    "OBJECT": ("modifiers", "constraints", "material_slots", "vertex_groups"),
+}
+
+# Bulk data read with foreach_get: (collection, attribute, values per item, array type)
+BULK_DATA = {
+    "MESH": (
+        ("vertices", "co", 3, "f"),
+        ("edges", "vertices", 2, "i"),
+        ("loops", "vertex_index", 1, "i"),
+        ("polygons", "loop_total", 1, "i"),
+        ("polygons", "material_index", 1, "i"),
+    ),
+}
+
+# Steps calling these operators read files outside the .blend, so their
+# outcome can't be trusted from the fingerprint alone
+EXTERNAL_OPS = ("import_", "wm.append", "wm.link", "image.open", "sound.open", "wm.open_mainfile")
+
+# Snapshots of states between steps kept on disk, least recently used dropped first
+SNAPSHOT_LIMIT = 64
+
+
+def block_key(block):
+    return (block.id_type, block.name_full)
+
+
+def plain(value):
+    """A repr-stable form of an RNA value (arrays to lists, flag sets sorted)."""
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if hasattr(value, "name_full"):
+        return value.name_full
+    try:
+        return [plain(item) for item in value]
+    except TypeError:
+        return repr(value)
+
+
+def rna_digest(digest, struct, abspath=None):
+    """Hash the simple RNA properties of struct, and the names of the IDs it points at."""
+    for prop in struct.bl_rna.properties:
+        name = prop.identifier
+        if name in VOLATILE_PROPS or prop.type not in SIMPLE_TYPES | {"POINTER"}:
+            continue
+        try:
+            value = getattr(struct, name)
+        except (AttributeError, RuntimeError):
+            continue
+        if prop.type == "POINTER":
+            if not hasattr(value, "name_full"):
+                continue  # Nested structs are covered where they matter (members, nodes)
+            value = value.name_full
+        elif prop.type == "STRING" and abspath and prop.subtype in ("FILE_PATH", "DIR_PATH") and value:
+            value = abspath(value)  # Saving a snapshot elsewhere remaps relative paths
+        digest.update(f"{name}={plain(value)!r};".encode("utf-8", "replace"))
+
+
+def nodes_digest(digest, tree, abspath=None):
+    for node in tree.nodes:
+        rna_digest(digest, node, abspath)
+        for socket in node.inputs:
+            digest.update(f"{socket.identifier}={plain(getattr(socket, 'default_value', None))!r};".encode())
+    for link in tree.links:
+        digest.update(f"{link.from_node.name}.{link.from_socket.identifier}>"
+                      f"{link.to_node.name}.{link.to_socket.identifier};".encode())
+
+
+def light_digest(block, abspath=None):
+    """Hash of a datablock's properties, members and node tree; cheap enough to
+    recompute for every block after every step."""
+    digest = hashlib.sha1()
+    rna_digest(digest, block, abspath)
+    for collection_name in MEMBER_COLLECTIONS.get(block.id_type, ()):
+        for item in getattr(block, collection_name, ()):
+            rna_digest(digest, item, abspath)
+    if block.id_type == "COLLECTION":
+        digest.update(repr(sorted(child.name_full for child in block.objects)).encode())
+        digest.update(repr(sorted(child.name_full for child in block.children)).encode())
+    elif block.id_type == "SCENE":
+        digest.update(repr(sorted(child.name_full for child in block.collection.objects)).encode())
+        digest.update(repr(sorted(child.name_full for child in block.collection.children)).encode())
+    tree = block if block.id_type == "NODETREE" else getattr(block, "node_tree", None)
+    if tree is not None:
+        nodes_digest(digest, tree, abspath)
+    return digest.hexdigest()
+
+
+def heavy_digest(block):
+    """Hash of a datablock's bulk data (mesh geometry, curve points)."""
+    digest = hashlib.sha1()
+    for collection_name, attribute, width, code in BULK_DATA.get(block.id_type, ()):
+        collection = getattr(block, collection_name)
+        values = array(code, [0]) * (len(collection) * width)
+        collection.foreach_get(attribute, values)
+        digest.update(values.tobytes())
+    if block.id_type == "CURVE":
+        for spline in block.splines:
+            for points, width in ((spline.bezier_points, 3), (spline.points, 4)):
+                values = array("f", [0.0]) * (len(points) * width)
+                points.foreach_get("co", values)
+                digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+class SceneFingerprint:
+    """Content hash of the blend data, kept up to date block by block.
+
+    The first pass hashes everything. After a step, every block's properties
+    are rehashed, which also catches edits the depsgraph never hears about,
+    but heavy bulk data only for the blocks the depsgraph reported updated.
+    """
+
+    def __init__(self, data, abspath=None):
+        self.data = data
+        self.abspath = abspath
+        self.blocks = {}  # (id_type, name) -> (light, heavy)
+
+    def iter_blocks(self):
+        for collection_name in FINGERPRINT_COLLECTIONS:
+            yield from getattr(self.data, collection_name, ())
+
+    def full(self):
+        self.blocks = {block_key(block): (light_digest(block, self.abspath), heavy_digest(block))
+                       for block in self.iter_blocks()}
+
+    def update(self, updated):
+        """Rehash after a step; updated holds the keys the depsgraph reported."""
+        blocks = {}
+        for block in self.iter_blocks():
+            key = block_key(block)
+            previous = self.blocks.get(key)
+            heavy = heavy_digest(block) if previous is None or key in updated else previous[1]
+            blocks[key] = (light_digest(block, self.abspath), heavy)
+        self.blocks = blocks
+
+    def state(self):
+        digest = hashlib.sha1()
+        for key in sorted(self.blocks):
+            digest.update(repr((key, self.blocks[key])).encode())
+        return digest.hexdigest()
+
+
+def step_cacheable(meta):
+    """False for scripts whose outcome depends on more than the scene: ones that
+    import or open files, or say '# incremental: no' in their frontmatter."""
+    if not meta or not meta.get("incremental", True):
+        return False
+    return not any(op.startswith(EXTERNAL_OPS) for op in meta["ops_calls"])
+
+
+def queue_identity(paths):
+    """Identifies a queue by its scripts in order, whatever their content."""
+    return hashlib.sha1(json.dumps(list(paths)).encode("utf-8")).hexdigest()
+
+
+class IncrementalCache:
+    """Outcomes of queue steps, keyed by what went in: the scene fingerprint
+    before the step, the script's content hash and its parameters.
+
+    Each outcome is the fingerprint after the step, and states between steps
+    are kept as .blend snapshots. A rerun can then reopen the snapshot after
+    the last unchanged step and run only from the first changed one. Every
+    state also remembers the state its run started from and the queue that
+    ran, so rerunning the same queue on the result of its previous run
+    rewinds to the same start, while any other queue runs on it as is.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.steps = {}  # step key -> state after
+        self.origins = {}  # state -> [state its run started from, queue that ran]
+        self.loaded = False
+        self.dirty = False
+
+    def load(self):
+        self.loaded = True
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.steps = data.get("steps", {})
+        # Origins saved without their queue can't be told apart from other queues' runs
+        self.origins = {state: origin for state, origin in data.get("origins", {}).items() if isinstance(origin, list)}
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump({"steps": self.steps, "origins": self.origins}, f)
+            os.replace(tmp_path, self.index_path)
+            self.dirty = False
+        except OSError as e:
+            print(f"Could not save incremental run cache: {e}")
+
+    def step_key(self, state, script_hash, params=None):
+        payload = json.dumps([state, script_hash, params], sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def snapshot_path(self, state):
+        return os.path.join(self.cache_dir, state[:24] + ".blend")
+
+    def has_snapshot(self, state):
+        return os.path.exists(self.snapshot_path(state))
+
+    def plan(self, current, steps, queue):
+        """Where to start a rerun of steps, given as (script hash or None when
+        not cacheable, params), on a scene whose fingerprint is current.
+        queue identifies the queue, see queue_identity().
+
+        Returns (index of the first step to run, state to reopen first or None,
+        whether the run's starting state was found). When it wasn't, the scene
+        holds the output of an unknown run and every step runs on it as is.
+        """
+        if not self.loaded:
+            self.load()
+        base = self.run_start(current, queue)
+        states = [base]
+        for script_hash, params in steps:
+            if script_hash is None:
+                break
+            after = self.steps.get(self.step_key(states[-1], script_hash, params))
+            if after is None:
+                break
+            states.append(after)
+        # Back off to the latest state that is on screen or can be reopened
+        for index in range(len(states) - 1, -1, -1):
+            if states[index] == current:
+                return index, None, True
+            if self.has_snapshot(states[index]):
+                return index, states[index], True
+        return 0, None, False
+
+    def run_start(self, state, queue):
+        """State the run of queue that led to state started from, else state itself."""
+        origin = self.origins.get(state)
+        return origin[0] if origin and origin[1] == queue else state
+
+    def record(self, before, script_hash, params, after, queue):
+        if not self.loaded:
+            self.load()
+        self.steps[self.step_key(before, script_hash, params)] = after
+        self.origins[after] = [self.run_start(before, queue), queue]
+        self.dirty = True
+
+    def prune(self, keep=SNAPSHOT_LIMIT):
+        try:
+            snapshots = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                         if name.endswith(".blend")]
+        except FileNotFoundError:
+            return
+        snapshots.sort(key=os.path.getmtime, reverse=True)
+        for path in snapshots[keep:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,49 @@
+import os
+import time
+from collections import OrderedDict
+from .bebtools_catalog import RACY_WINDOW_NS
+
+# Instruction files kept parsed in memory, least recently shown dropped first
+INSTRUCTION_CACHE_SIZE = 256
+
+
+def instructions_path(script_path):
+    return os.path.splitext(script_path)[0] + ".txt"
+
+
+class InstructionCache:
+    """Lines of the scripts' instruction .txt files, revalidated with one stat
+    against the file's mtime and size, so arrowing through the script list
+    only reads the files that changed or weren't shown lately."""
+
+    def __init__(self, limit=INSTRUCTION_CACHE_SIZE):
+        self.limit = limit
+        self.entries = OrderedDict()  # .txt path -> (mtime or None, size, lines)
+
+    def lines(self, script_path):
+        """Lines of a script's instructions, or None if it has none."""
+        info_path = instructions_path(script_path)
+        try:
+            st = os.stat(info_path)
+        except OSError:
+            self.entries.pop(info_path, None)
+            return None
+        cached = self.entries.get(info_path)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            self.entries.move_to_end(info_path)
+            return cached[2]
+        read = time.time_ns()
+        try:
+            with open(info_path, "r", errors="replace") as f:
+                lines = f.read().split("\n")
+        except OSError:
+            return None
+        trusted = read - st.st_mtime_ns > RACY_WINDOW_NS
+        self.entries[info_path] = (st.st_mtime_ns if trusted else None, st.st_size, lines)
+        self.entries.move_to_end(info_path)
+        while len(self.entries) > self.limit:
+            self.entries.popitem(last=False)
+        return lines
+
+    def clear(self):
+        self.entries.clear()
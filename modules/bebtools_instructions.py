@@ -2,7 +2,7 @@ import bpy
 import os
 from bpy.types import Operator
 from bpy.props import BoolProperty
-from .bebtools_utils import update_info_text, open_or_reuse_text_editor
+from .bebtools_utils import update_info_text, open_or_reuse_text_editor, refuse_read_only
 
 
 class BEBTOOLS_OT_EditInstructions(Operator):
@@ -53,6 +53,8 @@ class BEBTOOLS_OT_SaveInstructions(Operator):
             script_path = script_item.path
             script_name = script_item.name
             info_path = os.path.splitext(script_path)[0] + ".txt"
+            if refuse_read_only(self, script_path):
+                return {'CANCELLED'}
             text_block = None
             for area in context.screen.areas:
                 if area.type == 'TEXT_EDITOR' and area.spaces.active.text:
@@ -97,6 +99,8 @@ class BEBTOOLS_OT_PasteEditInstructions(Operator):
             script_path = script_item.path
             script_name = script_item.name
             info_path = os.path.splitext(script_path)[0] + ".txt"
+            if refuse_read_only(self, script_path):
+                return {'CANCELLED'}
             
             text_block = bpy.data.texts.get(script_name + ".txt")
             if not text_block and os.path.exists(info_path):
@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import uuid
+
+# Tells a run stopped in this Blender session, whose changes are still in
+# memory, apart from one that went down with a crash
+SESSION = uuid.uuid4().hex
+
+
+class RunJournal:
+    """Progress of the last queue run, rewritten after every script so a crash
+    loses at most the script that was running.
+
+    Checkpoints are copies of the .blend saved every few scripts or minutes.
+    Resuming after a crash reopens the latest one and reruns the scripts that
+    finished after it, since their changes were lost with the crash.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.data = None
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = None
+            return None
+        # Journals from before queue parameters hold [name, path] items
+        self.data["items"] = [list(item) + [{}] * (3 - len(item)) for item in self.data.get("items", [])]
+        return self.data
+
+    def save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(self.data, f, indent=1)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save queue run journal: {e}")
+
+    def begin(self, items, source):
+        self.data = {
+            "session": SESSION,
+            "source": source,  # File the run's changes are in
+            "original": source,  # File the run was started on
+            "items": [list(item) for item in items],
+            "started": time.time(),
+            "steps": [],
+            "checkpoint": None,
+            "finished": False,
+        }
+        self.save()
+
+    @property
+    def next_index(self):
+        return len(self.data["steps"]) if self.data else 0
+
+    def step(self, name, duration, error="", skipped=False):
+        step = {"name": name, "duration": duration, "error": error, "finished": time.time()}
+        if skipped:
+            step["skipped"] = True  # Unchanged since a previous run (incremental runs)
+        self.data["steps"].append(step)
+        self.save()
+
+    def checkpoint(self, path, index):
+        self.data["checkpoint"] = {"path": path, "index": index, "taken": time.time()}
+        self.save()
+
+    def finish(self):
+        self.data["finished"] = True
+        self.save()
+
+    def resumable(self):
+        return bool(self.data) and not self.data["finished"] and self.next_index < len(self.data["items"])
+
+    def resume_point(self, current_file):
+        """(index to resume at, checkpoint to reopen first or None), or None if
+        the run can't be resumed. A run stopped in this session on the same file
+        carries on in place; anything else restarts from the checkpoint."""
+        if self.data["session"] == SESSION and current_file == self.data["source"]:
+            return self.next_index, None
+        checkpoint = self.data["checkpoint"]
+        if checkpoint and os.path.exists(checkpoint["path"]):
+            return checkpoint["index"], checkpoint["path"]
+        return None
+
+    def rewind(self, index, source):
+        """Forget the steps from index on and adopt the run into this session,
+        now carrying on in source."""
+        self.data["steps"] = self.data["steps"][:index]
+        self.data["session"] = SESSION
+        self.data["source"] = source
+        self.save()
@@ -0,0 +1,196 @@
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .bebtools_catalog import ScriptCatalog
+
+# Directory probes in flight at once while scanning; network shares are
+# latency bound, so this is well above the core count on purpose
+SCAN_WORKERS = 16
+
+# current_dir of the top level when several roots are shown side by side
+LIBRARY_TOP = "<library>"
+
+
+def norm(path):
+    return os.path.normcase(os.path.normpath(os.path.abspath(path)))
+
+
+def overlaps(a, b):
+    """True if two normalized folders are the same or one lies inside the other."""
+    return a == b or a.startswith(b.rstrip(os.sep) + os.sep) or b.startswith(a.rstrip(os.sep) + os.sep)
+
+
+class ScriptLibrary:
+    """Several script roots merged in precedence order, each with its own cached
+    catalog so a slow share is only rescanned where it changed.
+
+    With one root the library behaves exactly like that root's catalog. With
+    several, the top level (LIBRARY_TOP) lists each root as a folder; search,
+    walks and name lookups span all of them, earlier roots winning.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.catalogs = []
+        self.labels = {}  # normalized root -> display name
+        self.read_only = set()  # normalized roots that must not be edited
+        self.generation = 0  # Bumped when the roots or their labels change
+        self.lock = threading.RLock()
+
+    def cache_path(self, root):
+        digest = hashlib.sha1(norm(root).encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.cache_dir, f"catalog-{digest}.json")
+
+    def set_roots(self, roots):
+        """Configure the library from (path, label, read_only) in precedence order.
+
+        A root inside another one (or holding one) is left out: both catalogs
+        would list the shared scripts, once per root.
+        """
+        with self.lock:
+            existing = {norm(c.root): c for c in self.catalogs}
+            catalogs = []
+            labels = {}
+            read_only = set()
+            for path, label, locked in roots:
+                key = norm(path)
+                other = next((root for root in labels if overlaps(key, root)), None)
+                if other:
+                    if other != key:
+                        print(f"Skipped library folder {path}: it overlaps {other}")
+                    continue
+                catalogs.append(existing.get(key) or ScriptCatalog(path, self.cache_path(path)))
+                labels[key] = label or os.path.basename(key)
+                if locked or not os.access(path, os.W_OK):
+                    read_only.add(key)
+            if [norm(c.root) for c in catalogs] != [norm(c.root) for c in self.catalogs] or labels != self.labels:
+                self.generation += 1
+            self.catalogs = catalogs
+            self.labels = labels
+            self.read_only = read_only
+
+    @property
+    def version(self):
+        return (self.generation,) + tuple(c.version for c in self.catalogs)
+
+    @property
+    def top(self):
+        """The directory shown first: the only root, or LIBRARY_TOP."""
+        if len(self.catalogs) == 1:
+            return self.catalogs[0].root
+        return LIBRARY_TOP
+
+    def catalog_for(self, path):
+        """The catalog whose root holds path (the innermost if roots nest), or None."""
+        best = None
+        for catalog in self.catalogs:
+            rel = catalog.rel_dir(path)
+            if rel is not None and (best is None or len(catalog.root) > len(best.root)):
+                best = catalog
+        return best
+
+    def overlapping(self, path):
+        """The configured root that path is, lies in or holds, or None."""
+        key = norm(path)
+        return next((c.root for c in self.catalogs if overlaps(key, norm(c.root))), None)
+
+    def root_of(self, path):
+        catalog = self.catalog_for(path)
+        return catalog.root if catalog else None
+
+    def is_root(self, path):
+        return any(norm(path) == norm(c.root) for c in self.catalogs)
+
+    def is_read_only(self, path):
+        root = self.root_of(path)
+        return root is not None and norm(root) in self.read_only
+
+    def writable_dir(self, directory):
+        """Where new scripts go when browsing directory: itself, or at the top
+        level the first root that can be written to."""
+        if directory == LIBRARY_TOP:
+            for catalog in self.catalogs:
+                if norm(catalog.root) not in self.read_only:
+                    return catalog.root
+            return None
+        return None if self.is_read_only(directory) else directory
+
+    def parent_of(self, directory):
+        """Target of the Back entry while directory is shown."""
+        if len(self.catalogs) > 1 and self.is_root(directory):
+            return LIBRARY_TOP
+        return os.path.dirname(directory)
+
+    def label_of(self, root):
+        return self.labels.get(norm(root), os.path.basename(norm(root)))
+
+    def find(self, rel_path, root=None, label=None):
+        """A script by its path relative to a root: under root if that is still
+        configured, else under the root with that label, else under any."""
+        with self.lock:
+            catalogs = list(self.catalogs)
+            labels = dict(self.labels)
+        preferred = [c for c in catalogs if root and norm(c.root) == norm(root)]
+        preferred += [c for c in catalogs if label and labels[norm(c.root)] == label]
+        for catalog in dict.fromkeys(preferred + catalogs):
+            entry = catalog.find(rel_path)
+            if entry:
+                return entry
+        return None
+
+    def refresh(self, directory=None, recursive=True):
+        """Revalidate one directory, or every root at once with parallel probes."""
+        if directory and directory != LIBRARY_TOP:
+            catalog = self.catalog_for(directory)
+            if catalog:
+                catalog.refresh(directory, recursive=recursive)
+            return
+        catalogs = list(self.catalogs)
+        if not recursive:
+            for catalog in catalogs:
+                catalog.refresh(recursive=False)
+            return
+        with ThreadPoolExecutor(SCAN_WORKERS) as probes:
+            # One thread per root so a slow share doesn't hold up the local ones
+            threads = [
+                threading.Thread(target=catalog.refresh, kwargs={"executor": probes}, daemon=True)
+                for catalog in catalogs
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+    def save(self):
+        for catalog in self.catalogs:
+            catalog.save()
+
+    def walk(self, directory=None, recursive=True, refresh=True):
+        """Script entries below a directory, or below every root in precedence order."""
+        if directory and directory != LIBRARY_TOP:
+            catalog = self.catalog_for(directory)
+            return catalog.walk(directory, recursive=recursive, refresh=refresh) if catalog else []
+        if refresh:
+            self.refresh(recursive=recursive)
+        result = []
+        for catalog in self.catalogs:
+            result.extend(catalog.walk(recursive=recursive, refresh=False))
+        return result
+
+    def rows(self):
+        """Rows of every root as in ScriptCatalog.rows(), preceded by one folder
+        row per root under LIBRARY_TOP when there are several."""
+        if len(self.catalogs) == 1:
+            return self.catalogs[0].rows()
+        result = [(self.labels[norm(c.root)], c.root, True, LIBRARY_TOP) for c in self.catalogs]
+        for catalog in self.catalogs:
+            result.extend(catalog.rows())
+        return result
+
+    def scripts_by_name(self):
+        """Map script names to entries; earlier roots win over later ones."""
+        by_name = {}
+        for entry in self.walk():
+            by_name.setdefault(entry.name, entry)
+        return by_name
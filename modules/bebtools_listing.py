@@ -0,0 +1,41 @@
+import os
+import time
+from .bebtools_catalog import RACY_WINDOW_NS
+
+
+class DirectoryItems:
+    """EnumProperty items built from a directory listing, relisted only when
+    the directory's mtime changes, so item callbacks run on every redraw
+    cost one stat instead of a listdir.
+
+    Blender only keeps pointers to the strings of the items a callback
+    returns, so the latest list for each key is held here for as long as it
+    may be shown.
+    """
+
+    def __init__(self, build):
+        self.build = build  # (directory, sorted os.DirEntry list, *args) -> items
+        self.lists = {}  # key -> (mtime or None, items)
+
+    def get(self, directory, *args):
+        key = (directory,) + args
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            mtime = None
+        cached = self.lists.get(key)
+        if cached and mtime is not None and cached[0] == mtime:
+            return cached[1]
+        listed = time.time_ns()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            entries = []
+        items = self.build(directory, entries, *args)
+        trusted = mtime is not None and listed - mtime > RACY_WINDOW_NS
+        self.lists[key] = (mtime if trusted else None, items)
+        return items
+
+    def clear(self):
+        self.lists.clear()
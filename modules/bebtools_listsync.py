@@ -0,0 +1,168 @@
+import os
+from bisect import bisect_left
+
+# Fields that identify a bebtools_scripts item
+SCRIPT_FIELDS = ("name", "path", "is_folder")
+
+
+def longest_increasing(values):
+    """Indices of one longest strictly increasing subsequence of values."""
+    tails = []  # tails[k] = smallest tail value of an increasing run of length k + 1
+    tail_indices = []
+    previous = [-1] * len(values)
+    for i, value in enumerate(values):
+        k = bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_indices.append(i)
+        else:
+            tails[k] = value
+            tail_indices[k] = i
+        previous[i] = tail_indices[k - 1] if k else -1
+    result = []
+    i = tail_indices[-1] if tail_indices else -1
+    while i != -1:
+        result.append(i)
+        i = previous[i]
+    result.reverse()
+    return result
+
+
+def sync_collection(collection, target, fields=SCRIPT_FIELDS, current=None):
+    """Make a CollectionProperty match target with as few RNA operations as possible.
+
+    target is a list of tuples holding the values of fields, in display order.
+    Items already in the collection are kept and only moved when needed; the
+    ones kept in place are a longest run already in target order. Returns the
+    number of adds, removes and moves performed. Pass current (the keys the
+    collection is known to hold) to skip reading every item back through RNA.
+    """
+    if current is None:
+        current = [tuple(getattr(item, field) for field in fields) for item in collection]
+
+    # Only the span between the common prefix and suffix needs any work
+    size, target_size = len(current), len(target)
+    base = 0
+    while base < size and base < target_size and current[base] == target[base]:
+        base += 1
+    tail = 0
+    while tail < size - base and tail < target_size - base and current[size - 1 - tail] == target[target_size - 1 - tail]:
+        tail += 1
+    current = current[base:size - tail]
+    target = target[base:target_size - tail]
+
+    wanted = {}
+    for position, key in enumerate(target):
+        wanted.setdefault(key, position)
+    operations = 0
+
+    # Drop items that are not wanted (or are duplicates), from the back so indices hold
+    seen = set()
+    keep = []
+    for key in current:
+        keep.append(key in wanted and key not in seen)
+        seen.add(key)
+    for index in range(len(current) - 1, -1, -1):
+        if not keep[index]:
+            collection.remove(base + index)
+            del current[index]
+            operations += 1
+
+    # Add whatever is missing at the end of the span; it gets moved into place below
+    present = set(current)
+    for key in target:
+        if key not in present:
+            item = collection.add()
+            for field, value in zip(fields, key):
+                setattr(item, field, value)
+            if tail:
+                collection.move(len(collection) - 1, base + len(current))
+            current.append(key)
+            present.add(key)
+            operations += 1
+
+    # Items on a longest in-order run stay put; every other item is moved to sit
+    # right after its predecessor in target, visiting them in target order
+    stay = {current[i] for i in longest_increasing([wanted[key] for key in current])}
+    for position, key in enumerate(target):
+        if key in stay:
+            continue
+        index = current.index(key)
+        if position == 0:
+            destination = 0
+        else:
+            predecessor = current.index(target[position - 1])
+            destination = predecessor if index < predecessor else predecessor + 1
+        if destination != index:
+            collection.move(base + index, base + destination)
+            current.insert(destination, current.pop(index))
+            operations += 1
+    return operations
+
+
+class ScriptListView:
+    """Precomputed filter flags and order for a list holding the whole catalog.
+
+    rows mirror the collection one to one as (name, path, is_folder, parent).
+    Row 0 is the Back entry and each folder's rows are contiguous and already
+    sorted, so browsing only flips flags and needs no reordering.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self.version = None
+        self.blocks = {}  # normalized parent dir -> (start, end) row range
+        self.index_of = {}  # path -> row index
+        self.results = None  # ranked paths while a search is shown
+        self.cache_key = None
+        self.cache = None
+
+    def set_rows(self, rows, version):
+        self.rows = []
+        self.version = version
+        self.blocks = {}
+        self.index_of = {}
+        self.add_rows(rows)
+
+    def add_rows(self, rows):
+        """Append rows, as a background load adds them to the collection."""
+        base = len(self.rows)
+        self.rows.extend(rows)
+        for index, row in enumerate(rows, base):
+            self.index_of[row[1]] = index
+            if row[3] is None:
+                continue
+            parent = os.path.normpath(row[3])
+            start, end = self.blocks.get(parent, (index, index))
+            self.blocks[parent] = (start, index + 1)
+        self.cache_key = None
+
+    def set_results(self, paths):
+        self.results = paths
+        self.cache_key = None
+
+    def filter(self, directory, root, bitflag, version):
+        """Return (flt_flags, flt_neworder) for UIList.filter_items; version is
+        the library's, so a change of roots never reuses an old filter."""
+        key = (directory, root, version, self.results is not None, bitflag)
+        if key == self.cache_key:
+            return self.cache
+        count = len(self.rows)
+        flags = [0] * count
+        order = []
+        if self.results is not None:
+            ranked = [self.index_of[path] for path in self.results if path in self.index_of]
+            positions = dict(zip(ranked, range(len(ranked))))
+            hidden = iter(range(len(ranked), count))
+            for index in ranked:
+                flags[index] = bitflag
+            order = [positions[i] if i in positions else next(hidden) for i in range(count)]
+        else:
+            directory = os.path.normpath(directory)
+            start, end = self.blocks.get(directory, (0, 0))
+            flags[start:end] = [bitflag] * (end - start)
+            if count and directory != os.path.normpath(root):
+                flags[0] = bitflag  # Back
+        self.cache_key = key
+        self.cache = (flags, order)
+        return self.cache
@@ -0,0 +1,100 @@
+import os
+import tracemalloc
+
+# bpy.data collections counted around each tracked run
+DATA_COLLECTIONS = (
+    "objects", "meshes", "materials", "images", "textures", "node_groups", "collections",
+    "cameras", "lights", "curves", "actions", "worlds",
+)
+
+# A run is flagged when it leaves more orphan datablocks of its own making than
+# this behind, or keeps more Python memory allocated than this afterwards.
+# Blocks that already existed don't count: deleting an object rightly orphans
+# its mesh.
+ORPHAN_LEAK_THRESHOLD = 0
+HEAVY_ALLOCATION_BYTES = 100 * 1024 * 1024
+
+# Allocation sites listed for a flagged run
+TOP_ALLOCATIONS = 3
+
+
+def datablock_counts(data):
+    """Size of each tracked bpy.data collection and the pointers of its blocks."""
+    counts = {}
+    pointers = set()
+    for name in DATA_COLLECTIONS:
+        collection = getattr(data, name, None)
+        if collection is None:
+            continue
+        counts[name] = len(collection)
+        pointers.update(block.as_pointer() for block in collection)
+    return counts, pointers
+
+
+def new_orphans(data, existing):
+    """Datablocks with no users that aren't among the existing pointers."""
+    orphans = 0
+    for name in DATA_COLLECTIONS:
+        collection = getattr(data, name, None)
+        if collection is None:
+            continue
+        orphans += sum(1 for block in collection if block.users == 0 and block.as_pointer() not in existing)
+    return orphans
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class MemoryTracker:
+    """tracemalloc and bpy.data snapshots around one script run."""
+
+    def __init__(self, data):
+        self.data = data
+        self.started_tracing = False
+        self.before = None
+        self.counts = None
+        self.existing = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        tracemalloc.reset_peak()
+        self.before = tracemalloc.take_snapshot()
+        self.counts, self.existing = datablock_counts(self.data)
+
+    def finish(self):
+        """Stop tracking and return the run's deltas:
+        {python_bytes, peak_bytes, datablocks: {name: delta}, top: [(site, bytes)], flags: [...]}"""
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self.started_tracing:
+            tracemalloc.stop()
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        growth = after.filter_traces(ignore).compare_to(self.before.filter_traces(ignore), "lineno")
+        python_bytes = sum(stat.size_diff for stat in growth)
+        counts, _ = datablock_counts(self.data)
+        deltas = {name: counts[name] - self.counts.get(name, 0) for name in counts}
+        deltas["orphans"] = new_orphans(self.data, self.existing)
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        top = [
+            (f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}", stat.size_diff)
+            for stat in growth[:TOP_ALLOCATIONS] if stat.size_diff > 0
+        ]
+        flags = []
+        if deltas.get("orphans", 0) > ORPHAN_LEAK_THRESHOLD:
+            flags.append(f"left {deltas['orphans']} orphan datablock(s)")
+        if python_bytes > HEAVY_ALLOCATION_BYTES:
+            flags.append(f"kept {format_bytes(python_bytes)} of Python memory (top: {', '.join(site for site, _ in top)})")
+        return {
+            "python_bytes": python_bytes,
+            "peak_bytes": peak,
+            "datablocks": deltas,
+            "top": top,
+            "flags": flags,
+        }
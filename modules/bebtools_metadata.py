@@ -0,0 +1,190 @@
+import os
+import ast
+import json
+import time
+import hashlib
+import threading
+from .bebtools_catalog import RACY_WINDOW_NS
+
+# Bumped when extract_metadata() output changes, invalidating cached entries
+METADATA_FORMAT = 2
+
+FRONTMATTER_FENCE = "# ---"
+
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_frontmatter(source):
+    """Read the optional comment block at the top of a script:
+
+        # ---
+        # tags: import, fbx
+        # category: Import
+        # blender: 4.2
+        # incremental: no
+        # ---
+    """
+    fields = {}
+    lines = source.lstrip("\ufeff").splitlines()
+    if not lines or lines[0].strip() != FRONTMATTER_FENCE:
+        return fields
+    for line in lines[1:]:
+        line = line.strip()
+        if line == FRONTMATTER_FENCE:
+            break
+        if not line.startswith("#") or ":" not in line:
+            continue
+        key, value = line[1:].split(":", 1)
+        fields[key.strip().lower()] = value.strip()
+    return fields
+
+
+def parse_version(text):
+    parts = []
+    for part in text.split("."):
+        if not part.strip().isdigit():
+            break
+        parts.append(int(part))
+    return tuple(parts)
+
+
+def dotted_name(node):
+    names = []
+    while isinstance(node, ast.Attribute):
+        names.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        names.append(node.id)
+        return ".".join(reversed(names))
+    return None
+
+
+def extract_metadata(source):
+    """Collect script metadata from its source without executing it."""
+    meta = {
+        "format": METADATA_FORMAT,
+        "docstring": "",
+        "tags": [],
+        "category": "",
+        "min_blender": [],
+        "bl_idnames": [],
+        "ops_calls": [],
+        "functions": [],
+        "incremental": True,
+        "error": "",
+    }
+    front = parse_frontmatter(source)
+    meta["tags"] = [tag.strip().lower() for tag in front.get("tags", "").split(",") if tag.strip()]
+    meta["category"] = front.get("category", "")
+    meta["min_blender"] = list(parse_version(front.get("blender", "")))
+    meta["incremental"] = front.get("incremental", "yes").lower() not in ("no", "false", "off", "0")
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError) as e:
+        meta["error"] = str(e)
+        return meta
+    meta["docstring"] = ast.get_docstring(tree) or ""
+    meta["functions"] = [node.name for node in tree.body if isinstance(node, ast.FunctionDef)]
+    bl_idnames = []
+    ops_calls = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+            if any(isinstance(t, ast.Name) and t.id == "bl_idname" for t in node.targets):
+                bl_idnames.append(node.value.value)
+        elif isinstance(node, ast.Call):
+            name = dotted_name(node.func)
+            if name and name.startswith("bpy.ops.") and name.count(".") == 3:
+                ops_calls.append(name[len("bpy.ops."):])
+    meta["bl_idnames"] = sorted(set(bl_idnames))
+    meta["ops_calls"] = sorted(set(ops_calls))
+    return meta
+
+
+class MetadataCache:
+    """Script metadata cached by content hash, with a stat stamp per path so
+    unchanged files are neither re-read nor re-parsed. A file modified within
+    RACY_WINDOW_NS of being read is hashed again next time."""
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.by_hash = {}
+        self.stamps = {}  # path -> [mtime, size, hash]
+        self.loaded = False
+        self.dirty = False
+        self.lock = threading.RLock()
+
+    def load(self):
+        with self.lock:
+            self.loaded = True
+            try:
+                with open(self.cache_path, "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return
+            if data.get("format") == METADATA_FORMAT:
+                self.by_hash = data.get("by_hash", {})
+                self.stamps = data.get("stamps", {})
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            # Forget hashes no path points at any more
+            live = {stamp[2] for stamp in self.stamps.values()}
+            self.by_hash = {h: meta for h, meta in self.by_hash.items() if h in live}
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"  # Batch workers may save at the same time
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump({"format": METADATA_FORMAT, "by_hash": self.by_hash, "stamps": self.stamps}, f)
+                os.replace(tmp_path, self.cache_path)
+                self.dirty = False
+            except OSError as e:
+                print(f"Could not save script metadata: {e}")
+
+    def get(self, path, mtime=None, size=None):
+        """Metadata for a script, or None if it cannot be read."""
+        with self.lock:
+            if not self.loaded:
+                self.load()
+            if mtime is None:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    return None
+                mtime, size = st.st_mtime_ns, st.st_size
+            stamp = self.stamps.get(path)
+            if stamp and stamp[0] == mtime and stamp[1] == size and stamp[2] in self.by_hash:
+                return self.by_hash[stamp[2]]
+            read = time.time_ns()
+            try:
+                digest = file_hash(path)
+                meta = self.by_hash.get(digest)
+                if meta is None:
+                    with open(path, "r", encoding="utf-8", errors="replace") as f:
+                        meta = extract_metadata(f.read())
+                    self.by_hash[digest] = meta
+            except OSError:
+                return None
+            trusted = read - mtime > RACY_WINDOW_NS
+            self.stamps[path] = [mtime if trusted else None, size, digest]
+            self.dirty = True
+            return meta
+
+    def forget(self, path):
+        with self.lock:
+            if self.stamps.pop(path, None) is not None:
+                self.dirty = True
+
+    def content_hash(self, path):
+        """Hash of a script's current contents, reusing the cached one when unchanged."""
+        with self.lock:
+            if self.get(path) is None:
+                return None
+            return self.stamps[path][2]
@@ -1,7 +1,9 @@
 import bpy
 import os
-from bpy.props import StringProperty, IntProperty, CollectionProperty, BoolProperty, EnumProperty
-from .bebtools_utils import update_info_text, get_scripts
+from bpy.props import StringProperty, IntProperty, CollectionProperty, BoolProperty, EnumProperty, FloatProperty
+from .bebtools_queuefile import is_queue_file
+from .bebtools_listing import DirectoryItems
+from .bebtools_utils import update_info_text, get_scripts, schedule_search, reload_library_roots, ADDON_ID, WATCH_INTERVAL
 
 def update_active_index(self, context):
     wm = context.window_manager
@@ -17,20 +19,76 @@ class BebToolsScriptItem(bpy.types.PropertyGroup):
 class BebToolsQueueItem(bpy.types.PropertyGroup):
     name: StringProperty(name="Script Name")
     path: StringProperty(name="Full Path")
+    params: StringProperty(name="Parameters", description="JSON keyword arguments for the script's run()")
 
 class BebToolsTextLine(bpy.types.PropertyGroup):
     name: StringProperty(name="Text Line")
 
+class BebToolsLibraryRoot(bpy.types.PropertyGroup):
+    name: StringProperty(name="Name", update=reload_library_roots)
+    path: StringProperty(name="Folder", subtype='DIR_PATH', update=reload_library_roots)
+    read_only: BoolProperty(
+        name="Read Only",
+        default=False,
+        description="Never create, edit or delete scripts in this library (e.g. a studio share)",
+        update=reload_library_roots
+    )
+
+class BebToolsPreferences(bpy.types.AddonPreferences):
+    bl_idname = ADDON_ID
+
+    library_roots: CollectionProperty(type=BebToolsLibraryRoot)
+    library_roots_index: IntProperty(default=-1)
+    watch_library: BoolProperty(
+        name="Watch for Changes",
+        default=True,
+        description="Pick up scripts added, removed or renamed outside Blender without reloading"
+    )
+    watch_interval: FloatProperty(
+        name="Check Every",
+        default=WATCH_INTERVAL,
+        min=0.5,
+        max=60.0,
+        subtype='TIME_ABSOLUTE',
+        unit='TIME_ABSOLUTE',
+        description="Seconds between checks of the shown folder; the whole library is checked less often"
+    )
+
+    def draw(self, context):
+        layout = self.layout
+        layout.label(text="Script Libraries (higher ones win when scripts share a name):")
+        row = layout.row()
+        row.template_list("BEBTOOLS_UL_LibraryRoots", "", self, "library_roots", self, "library_roots_index", rows=4)
+        col = row.column(align=True)
+        col.operator("bebtools.add_library_root", text="", icon="ADD")
+        col.operator("bebtools.remove_library_root", text="", icon="REMOVE")
+        col.separator()
+        col.operator("bebtools.move_library_root", text="", icon="TRIA_UP").direction = 'UP'
+        col.operator("bebtools.move_library_root", text="", icon="TRIA_DOWN").direction = 'DOWN'
+        layout.label(text="The bundled Beb.Tools scripts always come last.", icon="INFO")
+        row = layout.row()
+        row.prop(self, "watch_library")
+        sub = row.row()
+        sub.active = self.watch_library
+        sub.prop(self, "watch_interval")
+
 classes = (
     BebToolsScriptItem,
     BebToolsQueueItem,
     BebToolsTextLine,
+    BebToolsLibraryRoot,
+    BebToolsPreferences,
+)
+
+QUEUES_DIR = os.path.join(os.path.dirname(__file__), "..", "queues")
+
+# Saved queues for the dropdown, relisted only when the queues folder changes
+queue_items = DirectoryItems(
+    lambda directory, entries: [(entry.path, os.path.splitext(entry.name)[0], "") for entry in entries if is_queue_file(entry.name)]
 )
 
 def get_queue_files(self, context):
-    queues_dir = os.path.join(os.path.dirname(__file__), "..", "queues")
-    os.makedirs(queues_dir, exist_ok=True)
-    return [(os.path.join(queues_dir, f), f[:-4], "") for f in os.listdir(queues_dir) if f.endswith(".txt")]
+    return queue_items.get(QUEUES_DIR)
 
 def register_properties():
     for cls in classes:
@@ -82,9 +140,64 @@ def register_properties():
         name="Search Scripts",
         default="",
         description="Search for scripts across all folders",
-        update=lambda self, context: bpy.ops.bebtools.search_scripts('INVOKE_DEFAULT'),  # Trigger search on any change
+        update=schedule_search,  # Debounced search on any change
         search=lambda self, context, edit_text: None  # Enables the "X" inside the field (no autocomplete needed)
     )
+    bpy.types.WindowManager.bebtools_profile_runs = BoolProperty(
+        name="Profile Runs",
+        default=False,
+        description="Capture a cProfile of every script run into the run history (slows scripts down)"
+    )
+    bpy.types.WindowManager.bebtools_trace_ops = BoolProperty(
+        name="Trace bpy.ops",
+        default=False,
+        description="Time every bpy.ops call made by scripts and save a Chrome trace (chrome://tracing) per run"
+    )
+    bpy.types.WindowManager.bebtools_track_memory = BoolProperty(
+        name="Track Memory",
+        default=False,
+        description="Measure Python memory and bpy.data datablocks around each run and flag scripts that leak"
+    )
+    bpy.types.WindowManager.bebtools_undo_mode = EnumProperty(
+        name="Undo",
+        description="How script runs are recorded in the undo history",
+        items=[
+            ('SCRIPT', "Per Script", "One undo step after every script, also within a queue"),
+            ('QUEUE', "Per Run", "One undo step per Run or per whole queue"),
+            ('NONE', "Fast (No Undo)", "Skip undo pushes, which are slow and memory hungry on big scenes"),
+        ],
+        default='QUEUE'
+    )
+    bpy.types.WindowManager.bebtools_restore_point = BoolProperty(
+        name="Restore Point",
+        default=True,
+        description="In fast mode, save a copy of the .blend to a temp folder before running so it can be reverted"
+    )
+    bpy.types.WindowManager.bebtools_checkpoint_steps = IntProperty(
+        name="Checkpoint Every",
+        default=0,
+        min=0,
+        description="Save a checkpoint of the scene every this many scripts of a queue run, to resume from after a crash (0: off)"
+    )
+    bpy.types.WindowManager.bebtools_checkpoint_minutes = FloatProperty(
+        name="Checkpoint Minutes",
+        default=0.0,
+        min=0.0,
+        description="Also save a queue checkpoint when this many minutes passed since the last one (0: off)"
+    )
+    bpy.types.WindowManager.bebtools_incremental = BoolProperty(
+        name="Incremental",
+        default=False,
+        description="Skip queue scripts whose input scene and code are unchanged since an earlier run, "
+                    "reopening a snapshot of their result"
+    )
+    bpy.types.WindowManager.bebtools_snapshot_steps = IntProperty(
+        name="Snapshot Every",
+        default=5,
+        min=0,
+        description="During incremental queue runs, save a .blend snapshot of the scene every this many scripts; "
+                    "a rerun restarts from the latest one before the first changed script (0: only at the start)"
+    )
     bpy.types.WindowManager.bebtools_search_active = BoolProperty(
         name="Search Active",
         default=False,
@@ -105,6 +218,15 @@ def unregister_properties():
     del bpy.types.WindowManager.bebtools_folder_mode
     del bpy.types.WindowManager.bebtools_search_query
     del bpy.types.WindowManager.bebtools_search_active
+    del bpy.types.WindowManager.bebtools_profile_runs
+    del bpy.types.WindowManager.bebtools_trace_ops
+    del bpy.types.WindowManager.bebtools_track_memory
+    del bpy.types.WindowManager.bebtools_undo_mode
+    del bpy.types.WindowManager.bebtools_restore_point
+    del bpy.types.WindowManager.bebtools_checkpoint_steps
+    del bpy.types.WindowManager.bebtools_checkpoint_minutes
+    del bpy.types.WindowManager.bebtools_incremental
+    del bpy.types.WindowManager.bebtools_snapshot_steps
     
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
\ No newline at end of file
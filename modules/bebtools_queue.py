@@ -1,8 +1,14 @@
 import bpy
 import os
+import json
 from bpy.types import Operator
 from bpy.props import StringProperty, BoolProperty  # Added BoolProperty
-from .bebtools_utils import SCRIPTS_DIR
+from .bebtools_utils import (
+    library, metadata, run_script, code_cache, schedule_prewarm,
+    start_ops_trace, finish_ops_trace, begin_run, push_undo, queue_params, enqueue,
+    search_index, ensure_search_index, SEARCH_LIMIT,
+)
+from .bebtools_queuefile import QUEUE_EXTENSIONS, queue_item, write_queue, read_queue, resolve_queue
 
 class BEBTOOLS_OT_Queue(Operator):
     bl_idname = "bebtools.queue"
@@ -17,15 +23,12 @@ class BEBTOOLS_OT_Queue(Operator):
                 self.report({'WARNING'}, "Select a script to queue")
                 return {'CANCELLED'}
             script_name = script_item.name
-            if not any(item.name == script_name for item in wm.bebtools_queue):
-                item = wm.bebtools_queue.add()
-                item.name = script_name
-                item.path = script_item.path
-                wm.bebtools_queue_index = len(wm.bebtools_queue) - 1
+            added, skipped = enqueue(context, [script_item])
+            if skipped:
+                self.report({'WARNING'}, f"Can't queue {script_name}: {skipped[0][1]}")
+                return {'CANCELLED'}
+            if added:
                 self.report({'INFO'}, f"Queued {script_name}")
-                for area in context.screen.areas:
-                    if area.type == 'VIEW_3D':
-                        area.tag_redraw()
             else:
                 self.report({'WARNING'}, f"{script_name} is already in the queue")
         return {'FINISHED'}
@@ -99,22 +102,27 @@ class BEBTOOLS_OT_SaveQueue(Operator):
         if not name:
             self.report({'WARNING'}, "Please enter a queue name")
             return {'CANCELLED'}
-        if name.endswith(".txt"):
-            name = name[:-4]
+        if name.endswith(QUEUE_EXTENSIONS):
+            name = os.path.splitext(name)[0]
         
         queues_dir = os.path.join(os.path.dirname(__file__), "..", "queues")
         os.makedirs(queues_dir, exist_ok=True)
         
-        queue_path = os.path.join(queues_dir, f"{name}.txt")
-        if os.path.exists(queue_path):
-            self.report({'WARNING'}, f"Queue '{name}.txt' already exists")
+        queue_path = os.path.join(queues_dir, f"{name}.json")
+        if any(os.path.exists(os.path.join(queues_dir, name + ext)) for ext in QUEUE_EXTENSIONS):
+            self.report({'WARNING'}, f"Queue '{name}' already exists")
             return {'CANCELLED'}
 
         try:
-            with open(queue_path, "w") as f:
-                for item in wm.bebtools_queue:
-                    f.write(f"{item.name}\n")
-            self.report({'INFO'}, f"Saved queue to {name}.txt")
+            # Relative path, content hash and parameters per script, so loading
+            # finds the exact script again and notices if it changed since
+            items = [
+                queue_item(library, item.name, item.path, metadata.content_hash(item.path), queue_params(item))
+                for item in wm.bebtools_queue
+            ]
+            metadata.save()
+            write_queue(queue_path, items)
+            self.report({'INFO'}, f"Saved queue to {name}.json")
         except Exception as e:
             self.report({'ERROR'}, f"Error saving queue: {str(e)}")
             return {'CANCELLED'}
@@ -128,7 +136,7 @@ class BEBTOOLS_OT_LoadQueue(Operator):
     bl_options = {'REGISTER'}
 
     filepath: StringProperty(subtype="FILE_PATH")
-    filter_glob: StringProperty(default="*.txt", options={'HIDDEN'})
+    filter_glob: StringProperty(default="*.json;*.txt", options={'HIDDEN'})
 
     def invoke(self, context, event):
         queues_dir = os.path.join(os.path.dirname(__file__), "..", "queues")
@@ -143,41 +151,35 @@ class BEBTOOLS_OT_LoadQueue(Operator):
             self.report({'WARNING'}, "Selected file does not exist")
             return {'CANCELLED'}
 
-        script_names = []
         try:
-            with open(self.filepath, "r") as f:
-                script_names = [line.strip() for line in f.readlines() if line.strip()]
+            items = read_queue(self.filepath)
         except Exception as e:
             self.report({'ERROR'}, f"Error reading queue file: {str(e)}")
             return {'CANCELLED'}
 
-        if not script_names:
+        if not items:
             self.report({'WARNING'}, "Queue file is empty")
             return {'CANCELLED'}
 
-        scripts_dir = SCRIPTS_DIR
-        script_paths = {}
-        for root, _, files in os.walk(scripts_dir):
-            for file in files:
-                if file.endswith(".py") and not file.startswith("__"):
-                    script_name = file[:-3]
-                    script_paths[script_name] = os.path.join(root, file)
+        resolved, missing_scripts, changed = resolve_queue(items, library, metadata.content_hash)
+        library.save()
+        metadata.save()
 
         wm.bebtools_queue.clear()
-        missing_scripts = []
-        for name in script_names:
-            if name in script_paths:
-                item = wm.bebtools_queue.add()
-                item.name = name
-                item.path = script_paths[name]
-            else:
-                missing_scripts.append(name)
+        for name, path, params in resolved:
+            item = wm.bebtools_queue.add()
+            item.name = name
+            item.path = path
+            item.params = json.dumps(params) if params else ""
 
         if wm.bebtools_queue:
             wm.bebtools_queue_index = 0
+            schedule_prewarm()  # Compile the queued scripts before they're run
             self.report({'INFO'}, f"Loaded queue from {os.path.basename(self.filepath)}")
             if missing_scripts:
                 self.report({'WARNING'}, f"Could not find scripts: {', '.join(missing_scripts)}")
+            if changed:
+                self.report({'INFO'}, f"Changed since the queue was saved: {', '.join(changed)}")
             for area in context.screen.areas:
                 if area.type == 'VIEW_3D':
                     area.tag_redraw()
@@ -191,19 +193,28 @@ class BEBTOOLS_OT_RunSelected(Operator):
     bl_idname = "bebtools.run_selected"
     bl_label = "Run Selected"
     bl_description = "Run the selected script from the queue"
-    bl_options = {'REGISTER', 'UNDO'}
+    bl_options = {'REGISTER'}  # Undo steps are pushed by push_undo() per the undo mode
 
     def execute(self, context):
         wm = context.window_manager
         if wm.bebtools_queue_index >= 0 and wm.bebtools_queue_index < len(wm.bebtools_queue):
             script_item = wm.bebtools_queue[wm.bebtools_queue_index]
             script_path = script_item.path
+            if not begin_run(context):
+                self.report({'ERROR'}, "Could not save a restore point; nothing was run")
+                return {'CANCELLED'}
+            tracing = start_ops_trace(context, script_item.name)
             try:
-                with open(script_path, "r") as f:
-                    exec(f.read(), globals())
+                warnings = run_script(script_path, globals(), context, queue_params(script_item))
                 self.report({'INFO'}, f"Executed script: {script_item.name}")
+                for warning in warnings:
+                    self.report({'WARNING'}, f"{script_item.name} {warning}")
             except Exception as e:
                 self.report({'ERROR'}, f"Error running {script_item.name}: {str(e)}")
+            if tracing:
+                finish_ops_trace(self)
+            push_undo(context, script_item.name)
+            code_cache.save_runs()
         else:
             self.report({'WARNING'}, "No script selected in queue")
         for area in context.screen.areas:
@@ -221,7 +232,7 @@ class BEBTOOLS_OT_LoadSelectedQueue(Operator):
         wm = context.window_manager
         if wm.bebtools_selected_queue:
             bpy.ops.bebtools.load_queue(filepath=wm.bebtools_selected_queue)
-            self.report({'INFO'}, f"Loaded queue: {os.path.basename(wm.bebtools_selected_queue)[:-4]}")
+            self.report({'INFO'}, f"Loaded queue: {os.path.splitext(os.path.basename(wm.bebtools_selected_queue))[0]}")
         else:
             self.report({'WARNING'}, "No queue selected")
         return {'FINISHED'}
@@ -263,7 +274,7 @@ class BEBTOOLS_OT_DeleteQueue(Operator):
             queue_path = wm.bebtools_selected_queue
             try:
                 os.remove(queue_path)
-                self.report({'INFO'}, f"Deleted queue: {os.path.basename(queue_path)[:-4]}")
+                self.report({'INFO'}, f"Deleted queue: {os.path.splitext(os.path.basename(queue_path))[0]}")
                 if wm.bebtools_queue and wm.bebtools_queue[0].path.startswith(os.path.dirname(queue_path)):
                     wm.bebtools_queue.clear()
                     wm.bebtools_queue_index = -1
@@ -311,32 +322,41 @@ class BEBTOOLS_OT_QueueFolder(Operator):
             if not folder_item.is_folder or folder_item.name == "Back":
                 self.report({'WARNING'}, "Select a folder to queue")
                 return {'CANCELLED'}
-            folder_path = folder_item.path
-            # Use os.walk for recursive, os.listdir for non-recursive
-            if self.recursive:
-                for root, _, files in os.walk(folder_path):
-                    for file in sorted(files):  # Sort for consistent order
-                        if file.endswith(".py") and not file.startswith("__"):
-                            script_name = file[:-3]
-                            script_path = os.path.join(root, file)
-                            if not any(item.name == script_name for item in wm.bebtools_queue):
-                                item = wm.bebtools_queue.add()
-                                item.name = script_name
-                                item.path = script_path
-            else:
-                for file in sorted(os.listdir(folder_path)):
-                    full_path = os.path.join(folder_path, file)
-                    if os.path.isfile(full_path) and file.endswith(".py") and not file.startswith("__"):
-                        script_name = file[:-3]
-                        if not any(item.name == script_name for item in wm.bebtools_queue):
-                            item = wm.bebtools_queue.add()
-                            item.name = script_name
-                            item.path = full_path
-            wm.bebtools_queue_index = len(wm.bebtools_queue) - 1
-            self.report({'INFO'}, f"Queued all scripts from '{folder_item.name}'{' and subfolders' if self.recursive else ''}")
-            for area in context.screen.areas:
-                if area.type == 'VIEW_3D':
-                    area.tag_redraw()
+            added, skipped = enqueue(context, library.walk(folder_item.path, recursive=self.recursive))
+            library.save()
+            if skipped:
+                self.report({'WARNING'}, f"Skipped scripts that can't run here: {', '.join(name for name, _ in skipped)}")
+            self.report({'INFO'}, f"Queued {added} script(s) from '{folder_item.name}'{' and subfolders' if self.recursive else ''}")
+        return {'FINISHED'}
+
+class BEBTOOLS_OT_QueueResults(Operator):
+    bl_idname = "bebtools.queue_results"
+    bl_label = "Queue Results"
+    bl_description = "Add the scripts the search shows to the queue; filters like tag:fbx or category:rigging work too"
+    bl_options = {'REGISTER', 'INTERNAL'}
+
+    query: StringProperty(
+        name="Query",
+        default="",
+        description="Search whose matches to queue; the search field's query if empty"
+    )
+
+    def execute(self, context):
+        wm = context.window_manager
+        query = (self.query or wm.bebtools_search_query).strip().lower()
+        if not query:
+            self.report({'WARNING'}, "Search for scripts to queue first")
+            return {'CANCELLED'}
+        ensure_search_index(refresh=not wm.bebtools_search_active)
+        # The same ranked matches the list shows, so Run All only runs scripts the user saw
+        matches = search_index.search(query, limit=SEARCH_LIMIT)
+        if not matches:
+            self.report({'WARNING'}, f"No scripts match '{query}'")
+            return {'CANCELLED'}
+        added, skipped = enqueue(context, matches)
+        if skipped:
+            self.report({'WARNING'}, f"Skipped scripts that can't run here: {', '.join(name for name, _ in skipped)}")
+        self.report({'INFO'}, f"Queued {added} of {len(matches)} script(s) matching '{query}'")
         return {'FINISHED'}
 
 classes = (
@@ -351,4 +371,5 @@ classes = (
     BEBTOOLS_OT_LoadSelectedQueue,
     BEBTOOLS_OT_DeleteQueue,
     BEBTOOLS_OT_QueueFolder,  # Register new operator
+    BEBTOOLS_OT_QueueResults,
 )
\ No newline at end of file
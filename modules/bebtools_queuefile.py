@@ -0,0 +1,77 @@
+import os
+import json
+from collections import defaultdict
+
+# Bumped when the layout of saved .json queues changes
+QUEUE_FORMAT = 1
+
+# Saved queue files, newest format first; .txt queues hold one script name per line
+QUEUE_EXTENSIONS = (".json", ".txt")
+
+
+def is_queue_file(filename):
+    return filename.endswith(QUEUE_EXTENSIONS)
+
+
+def queue_item(library, name, path, content_hash=None, params=None):
+    """What a saved queue keeps about one script: where it lives relative to
+    its library root, and what it looked like when the queue was saved."""
+    root = library.root_of(path)
+    item = {"name": name, "root": None, "label": None, "path": None, "hash": content_hash, "params": params or {}}
+    if root:
+        item.update(root=root, label=library.label_of(root),
+                    path=os.path.relpath(path, root).replace(os.sep, "/"))
+    return item
+
+
+def write_queue(path, items):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"format": QUEUE_FORMAT, "items": items}, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def read_queue(path):
+    """Items of a saved queue; the names of an old .txt queue become name-only items."""
+    with open(path, "r") as f:
+        if not path.endswith(".json"):
+            return [{"name": line.strip()} for line in f if line.strip()]
+        data = json.load(f)
+    if data.get("format", QUEUE_FORMAT) > QUEUE_FORMAT:
+        raise ValueError("saved by a newer Beb.Tools")
+    return data["items"]
+
+
+def resolve_queue(items, library, content_hash):
+    """Find the scripts of saved queue items in the library.
+
+    Items are looked up by their relative path, one folder stat each. Only
+    items that moved (or old name-only ones) fall back to one walk of the
+    library by name, preferring the same-named script whose content matches.
+
+    Returns ([(name, path, params)], missing names, names whose script changed
+    since the queue was saved).
+    """
+    resolved = []
+    missing = []
+    changed = []
+    by_name = None
+    for item in items:
+        entry = library.find(item["path"], item.get("root"), item.get("label")) if item.get("path") else None
+        if entry is None:
+            if by_name is None:
+                by_name = defaultdict(list)
+                for candidate in library.walk():
+                    by_name[candidate.name].append(candidate)
+            candidates = by_name.get(item["name"], [])
+            entry = next(
+                (c for c in candidates if item.get("hash") and content_hash(c.path) == item["hash"]),
+                candidates[0] if candidates else None,
+            )
+        if entry is None:
+            missing.append(item["name"])
+            continue
+        if item.get("hash") and content_hash(entry.path) != item["hash"]:
+            changed.append(item["name"])
+        resolved.append((item["name"], entry.path, item.get("params") or {}))
+    return resolved, missing, changed
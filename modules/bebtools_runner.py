@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import types
+import marshal
+import time
+import hashlib
+import threading
+from importlib.util import MAGIC_NUMBER
+from .bebtools_catalog import RACY_WINDOW_NS
+
+# Functions that make a script a module-style script rather than an exec one
+MODULE_PROTOCOL = ("register", "run")
+
+# Scripts kept compiled in memory, most used first, when warming up on idle
+PREWARM_COUNT = 40
+
+
+class CodeCache:
+    """Compiled script code objects keyed by path, mtime and size.
+
+    Hits come from memory, then from a marshal file per script in cache_dir
+    (stamped with the interpreter's magic number), and only then from
+    compiling the source again; a file modified within RACY_WINDOW_NS of
+    being read is compiled afresh until its mtime is old enough to trust.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.codes = {}  # path -> (mtime, size, code)
+        self.runs = {}  # path -> run count, persisted to pick what to prewarm
+        self.runs_loaded = False
+        self.runs_dirty = False
+        self.lock = threading.RLock()
+
+    def marshal_path(self, path):
+        digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".marshal")
+
+    def read_marshal(self, path, mtime, size):
+        try:
+            with open(self.marshal_path(path), "rb") as f:
+                header = json.loads(f.readline())
+                if header != [MAGIC_NUMBER.hex(), mtime, size]:
+                    return None
+                return marshal.load(f)
+        except (OSError, ValueError, EOFError, TypeError):
+            return None
+
+    def write_marshal(self, path, mtime, size, code):
+        target = self.marshal_path(path)
+        tmp_path = f"{target}.{os.getpid()}.tmp"  # Batch workers may compile at the same time
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps([MAGIC_NUMBER.hex(), mtime, size]).encode("ascii") + b"\n")
+                marshal.dump(code, f)
+            os.replace(tmp_path, target)
+        except OSError as e:
+            print(f"Could not cache compiled script {path}: {e}")
+
+    def get(self, path):
+        """Code object for a script, compiling it only if it changed.
+
+        Raises OSError if the file can't be read and SyntaxError if it doesn't compile.
+        """
+        st = os.stat(path)
+        mtime, size = st.st_mtime_ns, st.st_size
+        with self.lock:
+            cached = self.codes.get(path)
+            if cached and cached[0] == mtime and cached[1] == size:
+                return cached[2]
+        trusted = time.time_ns() - mtime > RACY_WINDOW_NS
+        code = self.read_marshal(path, mtime, size) if trusted else None
+        if code is None:
+            with open(path, "rb") as f:
+                source = f.read()
+            # Bytes let compile() honour a coding cookie; the path shows up in tracebacks
+            code = compile(source, path, "exec", dont_inherit=True)
+            if trusted:
+                self.write_marshal(path, mtime, size, code)
+        with self.lock:
+            self.codes[path] = (mtime if trusted else None, size, code)
+        return code
+
+    def forget(self, path):
+        with self.lock:
+            self.codes.pop(path, None)
+
+    def load_runs(self):
+        with self.lock:
+            self.runs_loaded = True
+            try:
+                with open(os.path.join(self.cache_dir, "runs.json"), "r") as f:
+                    self.runs = json.load(f)
+            except (OSError, ValueError):
+                self.runs = {}
+
+    def save_runs(self):
+        with self.lock:
+            if not self.runs_dirty:
+                return
+            os.makedirs(self.cache_dir, exist_ok=True)
+            runs_path = os.path.join(self.cache_dir, "runs.json")
+            try:
+                with open(runs_path + ".tmp", "w") as f:
+                    json.dump(self.runs, f)
+                os.replace(runs_path + ".tmp", runs_path)
+                self.runs_dirty = False
+            except OSError as e:
+                print(f"Could not save script run counts: {e}")
+
+    def count_run(self, path):
+        with self.lock:
+            if not self.runs_loaded:
+                self.load_runs()
+            self.runs[path] = self.runs.get(path, 0) + 1
+            self.runs_dirty = True
+
+    def most_used(self, count=PREWARM_COUNT):
+        with self.lock:
+            if not self.runs_loaded:
+                self.load_runs()
+            ranked = sorted(self.runs, key=self.runs.get, reverse=True)
+            return [path for path in ranked[:count] if path not in self.codes]
+
+
+def is_module_script(meta):
+    """True if a script's metadata shows it follows the register()/run() protocol."""
+    return bool(meta) and all(name in meta["functions"] for name in MODULE_PROTOCOL)
+
+
+class ScriptModules:
+    """Module-style scripts, each imported once into its own namespace.
+
+    Importing runs the script's top level and register() a single time;
+    runs only call run(context, **params). A script is re-imported (after
+    its unregister(), if any) only when the file changes.
+    """
+
+    def __init__(self, code_cache):
+        self.code_cache = code_cache
+        self.modules = {}  # path -> (code object it was imported from, module)
+
+    def module_name(self, path):
+        return "bebtools_script_" + hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+
+    def load(self, path):
+        # The code cache decides whether the file changed, racy edits included
+        code = self.code_cache.get(path)
+        cached = self.modules.get(path)
+        if cached and cached[0] is code:
+            return cached[1]
+        if cached:
+            self.unload(path)
+        name = self.module_name(path)
+        module = types.ModuleType(name)
+        module.__file__ = path
+        sys.modules[name] = module  # Lets classes and pickles resolve their module
+        try:
+            exec(code, module.__dict__)
+            module.register()
+        except BaseException:
+            sys.modules.pop(name, None)
+            # register() may have got partway; undo it so the next load isn't "already registered"
+            self.unregister(path, module)
+            raise
+        self.modules[path] = (code, module)
+        return module
+
+    def run(self, path, context, params=None):
+        return self.load(path).run(context, **(params or {}))
+
+    def unload(self, path):
+        cached = self.modules.pop(path, None)
+        if cached is None:
+            return
+        module = cached[1]
+        sys.modules.pop(module.__name__, None)
+        self.unregister(path, module)
+
+    def unregister(self, path, module):
+        unregister = getattr(module, "unregister", None)
+        if callable(unregister):
+            try:
+                unregister()
+            except Exception as e:
+                print(f"Error unregistering {path}: {e}")
+
+    def unload_all(self):
+        for path in list(self.modules):
+            self.unload(path)
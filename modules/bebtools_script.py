@@ -2,7 +2,32 @@ import bpy
 import os
 from bpy.types import Operator
 from bpy.props import StringProperty, BoolProperty, EnumProperty
-from .bebtools_utils import SCRIPTS_DIR, update_info_text, open_or_reuse_text_editor, get_scripts
+from .bebtools_utils import (
+    SCRIPTS_DIR, update_info_text, open_or_reuse_text_editor, get_scripts, refresh_script_list, library, refuse_read_only,
+)
+from .bebtools_listing import DirectoryItems
+
+def _move_items(current_dir, entries, root):
+    parent_dir = os.path.dirname(current_dir)
+    # Add subfolders of current directory
+    options = [(entry.path, entry.name, f"Move to {entry.name} (current level)") for entry in entries if entry.is_dir()]
+
+    # Add parent directory (one level up), if not at root
+    if current_dir != root:
+        options.append((parent_dir, "Scripts" if parent_dir == root else os.path.basename(parent_dir), f"Move up to {os.path.basename(parent_dir)}"))
+
+    return options if options else [(root, "Scripts", "Move to /scripts/")]
+
+# Destinations offered by the move dialogs, relisted only when the folder changes
+move_items = DirectoryItems(_move_items)
+
+def get_move_options(self, context):
+    wm = context.window_manager
+    current_dir = wm.bebtools_current_dir if wm.bebtools_current_dir else library.top
+    root = library.root_of(current_dir) or SCRIPTS_DIR
+    if not os.path.isdir(current_dir):
+        current_dir = root  # Top level of several libraries: offer the first one
+    return move_items.get(current_dir, root)
 
 class BEBTOOLS_OT_MoveTo(Operator):
     bl_idname = "bebtools.move_to"
@@ -10,24 +35,6 @@ class BEBTOOLS_OT_MoveTo(Operator):
     bl_description = "Move the selected script to another folder"
     bl_options = {'REGISTER', 'INTERNAL'}
 
-    def get_move_options(self, context):
-        wm = context.window_manager
-        current_dir = wm.bebtools_current_dir if wm.bebtools_current_dir else SCRIPTS_DIR
-        parent_dir = os.path.dirname(current_dir)
-        options = []
-
-        # Add subfolders of current directory
-        for d in sorted(os.listdir(current_dir)):
-            full_path = os.path.join(current_dir, d)
-            if os.path.isdir(full_path):
-                options.append((full_path, d, f"Move to {d} (current level)"))
-
-        # Add parent directory (one level up), if not at root
-        if current_dir != SCRIPTS_DIR:
-            options.append((parent_dir, "Scripts" if parent_dir == SCRIPTS_DIR else os.path.basename(parent_dir), f"Move up to {os.path.basename(parent_dir)}"))
-
-        return options if options else [(SCRIPTS_DIR, "Scripts", "Move to /scripts/")]
-
     destination: bpy.props.EnumProperty(
         name="Destination Folder",
         description="Choose a folder to move the script to",
@@ -58,6 +65,8 @@ class BEBTOOLS_OT_MoveTo(Operator):
                 return {'CANCELLED'}
 
             src_py = script_item.path
+            if refuse_read_only(self, src_py):
+                return {'CANCELLED'}
             src_txt = os.path.splitext(src_py)[0] + ".txt"
             dest_dir = self.destination
             dest_py = os.path.join(dest_dir, os.path.basename(src_py))
@@ -126,6 +135,8 @@ class BEBTOOLS_OT_SaveScript(Operator):
                 return {'CANCELLED'}
             script_path = script_item.path
             script_name = script_item.name
+            if refuse_read_only(self, script_path):
+                return {'CANCELLED'}
             text_block = None
             for area in context.screen.areas:
                 if area.type == 'TEXT_EDITOR' and area.spaces.active.text:
@@ -168,7 +179,9 @@ class BEBTOOLS_OT_PasteEdit(Operator):
             script_item = wm.bebtools_scripts[wm.bebtools_active_index]
             script_path = script_item.path
             script_name = script_item.name
-            
+            if refuse_read_only(self, script_path):
+                return {'CANCELLED'}
+
             text_block = bpy.data.texts.get(script_name + ".py")
             if not text_block and os.path.exists(script_path):
                 text_block = bpy.data.texts.new(script_name + ".py")
@@ -225,7 +238,10 @@ class BEBTOOLS_OT_NewScript(Operator):
             self.report({'WARNING'}, "Please enter a name")
             return {'CANCELLED'}
 
-        base_dir = wm.bebtools_current_dir if wm.bebtools_current_dir else SCRIPTS_DIR
+        base_dir = library.writable_dir(wm.bebtools_current_dir or library.top)
+        if base_dir is None:
+            self.report({'WARNING'}, "This library is read-only")
+            return {'CANCELLED'}
         if name.endswith(".py"):
             name = name[:-3]
         script_path = os.path.join(base_dir, f"{name}.py")
@@ -240,12 +256,6 @@ class BEBTOOLS_OT_NewScript(Operator):
             f.write(f"Instructions for {name}\n")
 
         get_scripts(base_dir)
-        if base_dir != SCRIPTS_DIR:
-            back_item = wm.bebtools_scripts.add()
-            back_item.name = "Back"
-            back_item.path = os.path.dirname(base_dir)
-            back_item.is_folder = True
-            wm.bebtools_scripts.move(len(wm.bebtools_scripts) - 1, 0)
         wm.bebtools_active_index = -1
         text_block = bpy.data.texts.new(f"{name}.py")
         text_block.from_string("# New script created by Beb.Tools\n")
@@ -276,7 +286,10 @@ class BEBTOOLS_OT_NewFolder(Operator):
             self.report({'WARNING'}, "Please enter a name")
             return {'CANCELLED'}
 
-        base_dir = wm.bebtools_current_dir if wm.bebtools_current_dir else SCRIPTS_DIR
+        base_dir = library.writable_dir(wm.bebtools_current_dir or library.top)
+        if base_dir is None:
+            self.report({'WARNING'}, "This library is read-only")
+            return {'CANCELLED'}
         folder_path = os.path.join(base_dir, name)
         if os.path.exists(folder_path):
             self.report({'WARNING'}, f"Folder '{name}' already exists in this folder")
@@ -285,12 +298,6 @@ class BEBTOOLS_OT_NewFolder(Operator):
         try:
             os.makedirs(folder_path, exist_ok=True)
             get_scripts(base_dir)
-            if base_dir != SCRIPTS_DIR:
-                back_item = wm.bebtools_scripts.add()
-                back_item.name = "Back"
-                back_item.path = os.path.dirname(base_dir)
-                back_item.is_folder = True
-                wm.bebtools_scripts.move(len(wm.bebtools_scripts) - 1, 0)
             wm.bebtools_active_index = -1
             update_info_text(context)
             self.report({'INFO'}, f"Created folder '{name}'")
@@ -313,17 +320,9 @@ class BEBTOOLS_OT_OpenFolderContents(Operator):
                 self.report({'WARNING'}, "Select a folder to open")
                 return {'CANCELLED'}
             folder_path = folder_item.path
-            parent_path = os.path.dirname(folder_path)
-            print(f"Opening folder: {folder_path}, Parent: {parent_path}")  # Debug log
+            print(f"Opening folder: {folder_path}")  # Debug log
             wm.bebtools_active_index = -1  # Reset before navigation
-            get_scripts(folder_path)
-            # Add Back if there’s a parent directory
-            if parent_path and parent_path != folder_path:  # Ensure parent exists and isn’t self
-                back_item = wm.bebtools_scripts.add()
-                back_item.name = "Back"
-                back_item.path = parent_path
-                back_item.is_folder = True
-                wm.bebtools_scripts.move(len(wm.bebtools_scripts) - 1, 0)
+            get_scripts(folder_path)  # Adds Back to the parent directory
             wm.bebtools_current_dir = folder_path
             update_info_text(context)
             self.report({'INFO'}, f"Opened folder '{folder_item.name}'")
@@ -359,18 +358,17 @@ class BEBTOOLS_OT_DeleteFolder(Operator):
 
             folder_path = folder_item.path
             folder_name = folder_item.name
-            parent_dir = os.path.dirname(folder_path)  # Stay in parent after delete
+            if library.is_root(folder_path):
+                self.report({'WARNING'}, "Remove libraries in the add-on preferences instead")
+                return {'CANCELLED'}
+            if refuse_read_only(self, folder_path):
+                return {'CANCELLED'}
+            parent_dir = library.parent_of(folder_path)  # Stay in parent after delete
             try:
                 import shutil
                 shutil.rmtree(folder_path)
                 self.report({'INFO'}, f"Deleted folder '{folder_name}' and its contents")
                 get_scripts(parent_dir)  # Reload parent dir, not root
-                if parent_dir != SCRIPTS_DIR:  # Add Back if not at root
-                    back_item = wm.bebtools_scripts.add()
-                    back_item.name = "Back"
-                    back_item.path = os.path.dirname(parent_dir)
-                    back_item.is_folder = True
-                    wm.bebtools_scripts.move(len(wm.bebtools_scripts) - 1, 0)
                 wm.bebtools_active_index = -1
                 wm.bebtools_current_dir = parent_dir  # Update current dir
                 update_info_text(context)
@@ -400,20 +398,21 @@ class BEBTOOLS_OT_DeleteScript(Operator):
                 self.report({'WARNING'}, "Select a script to delete")
                 return {'CANCELLED'}
             script_path = script_item.path
+            script_name = script_item.name
+            if refuse_read_only(self, script_path):
+                return {'CANCELLED'}
             info_path = os.path.splitext(script_path)[0] + ".txt"
             try:
                 if os.path.exists(script_path):
                     os.remove(script_path)
                 if os.path.exists(info_path):
                     os.remove(info_path)
-                wm.bebtools_scripts.remove(wm.bebtools_active_index)
-                wm.bebtools_active_index = min(wm.bebtools_active_index, len(wm.bebtools_scripts) - 1)
-                if not wm.bebtools_queue:
-                    wm.bebtools_active_index = -1
+                refresh_script_list(os.path.dirname(script_path))
+                wm.bebtools_active_index = -1
                 update_info_text(context)
-                self.report({'INFO'}, f"Deleted {script_item.name}.py and its info file")
+                self.report({'INFO'}, f"Deleted {script_name}.py and its info file")
             except Exception as e:
-                self.report({'ERROR'}, f"Error deleting {script_item.name}: {str(e)}")
+                self.report({'ERROR'}, f"Error deleting {script_name}: {str(e)}")
         return {'FINISHED'}
 
 class BEBTOOLS_OT_RenameScript(Operator):
@@ -449,6 +448,8 @@ class BEBTOOLS_OT_RenameScript(Operator):
                 return {'CANCELLED'}
 
             old_py = script_item.path
+            if refuse_read_only(self, old_py):
+                return {'CANCELLED'}
             old_txt = os.path.splitext(old_py)[0] + ".txt"
             new_name = self.new_name.strip()
             if not new_name:
@@ -512,6 +513,11 @@ class BEBTOOLS_OT_RenameFolder(Operator):
                 return {'CANCELLED'}
 
             old_path = folder_item.path
+            if library.is_root(old_path):
+                self.report({'WARNING'}, "Rename libraries in the add-on preferences instead")
+                return {'CANCELLED'}
+            if refuse_read_only(self, old_path):
+                return {'CANCELLED'}
             new_name = self.new_name.strip()
             if not new_name:
                 self.report({'WARNING'}, "Please enter a new name")
@@ -539,24 +545,6 @@ class BEBTOOLS_OT_MoveFolder(Operator):
     bl_description = "Move the selected folder to another location"
     bl_options = {'REGISTER', 'INTERNAL'}
 
-    def get_move_options(self, context):
-        wm = context.window_manager
-        current_dir = wm.bebtools_current_dir if wm.bebtools_current_dir else SCRIPTS_DIR
-        parent_dir = os.path.dirname(current_dir)
-        options = []
-
-        # Add subfolders of current directory
-        for d in sorted(os.listdir(current_dir)):
-            full_path = os.path.join(current_dir, d)
-            if os.path.isdir(full_path):
-                options.append((full_path, d, f"Move to {d} (current level)"))
-
-        # Add parent directory (one level up), if not at root
-        if current_dir != SCRIPTS_DIR:
-            options.append((parent_dir, "Scripts" if parent_dir == SCRIPTS_DIR else os.path.basename(parent_dir), f"Move up to {os.path.basename(parent_dir)}"))
-
-        return options if options else [(SCRIPTS_DIR, "Scripts", "Move to /scripts/")]
-
     destination: bpy.props.EnumProperty(
         name="Destination Folder",
         description="Choose a folder to move the folder to",
@@ -587,6 +575,11 @@ class BEBTOOLS_OT_MoveFolder(Operator):
                 return {'CANCELLED'}
 
             src_path = folder_item.path
+            if library.is_root(src_path):
+                self.report({'WARNING'}, "Libraries can't be moved")
+                return {'CANCELLED'}
+            if refuse_read_only(self, src_path):
+                return {'CANCELLED'}
             dest_dir = self.destination
             dest_path = os.path.join(dest_dir, os.path.basename(src_path))
 
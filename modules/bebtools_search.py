@@ -0,0 +1,276 @@
+import os
+import re
+import heapq
+import threading
+from collections import Counter
+from functools import lru_cache
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Score for a query word found in each field of a script
+NAME_SCORE = 10.0
+FOLDER_SCORE = 4.0
+META_SCORE = 3.0
+TEXT_SCORE = 1.0
+
+# Query prefixes that filter on script metadata instead of matching text
+FACETS = {"tag": "tags", "category": "category", "cat": "category"}
+
+# Words sharing at least this Dice coefficient of trigrams count as typos of
+# each other; such fuzzy hits are weighted below exact substring hits
+FUZZY_MIN_SIMILARITY = 0.4
+FUZZY_WEIGHT = 0.8
+
+
+def words(text):
+    return WORD_RE.findall(text.lower())
+
+
+@lru_cache(maxsize=65536)
+def word_grams(word):
+    """Trigrams of a word padded so one and two letter prefixes are indexed too."""
+    padded = "$$" + word + "$"
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def query_grams(word):
+    # Short words can only be matched as word prefixes; longer ones anywhere
+    if len(word) < 3:
+        return {("$$" + word)[-3:]} if len(word) == 2 else {"$$" + word}
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def read_instructions(script_path):
+    info_file = os.path.splitext(script_path)[0] + ".txt"
+    try:
+        with open(info_file, "r", errors="replace") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+FIELDS = ("name", "folder", "meta", "text")
+
+
+def file_stamp(entry):
+    """(mtime, size, instructions mtime) of a script as on disk now.
+
+    Catalog entries only catch up when their folder changes, which editing a
+    file in place doesn't do, so the files themselves are checked.
+    """
+    try:
+        st = os.stat(entry.path)
+    except OSError:
+        return None
+    txt_mtime = None
+    if entry.has_txt:
+        try:
+            txt_mtime = os.stat(os.path.splitext(entry.path)[0] + ".txt").st_mtime_ns
+        except OSError:
+            pass
+    return (st.st_mtime_ns, st.st_size, txt_mtime)
+
+
+def split_query(query):
+    """Split a query into plain words and (facet, value) filters like tag:fbx."""
+    plain = []
+    filters = []
+    for token in query.lower().split():
+        facet, sep, value = token.partition(":")
+        if sep and facet in FACETS and value:
+            filters.append((FACETS[facet], value))
+        else:
+            plain.append(token)
+    return " ".join(plain), filters
+
+
+class SearchIndex:
+    """Inverted index over script names, folders, metadata and instruction text.
+
+    Each field maps words to the scripts containing them, and a trigram index
+    over the shared vocabulary finds the words matching a query fragment.
+    """
+
+    def __init__(self, metadata=None):
+        self.metadata = metadata
+        self.docs = {}  # path -> document dict
+        self.word_docs = {field: {} for field in FIELDS}  # field -> word -> set of paths
+        self.vocab_grams = {}  # trigram -> set of words
+        self.vocab = set()
+        self.match_cache = {}  # query fragment -> {vocabulary word: similarity}
+        self.version = None
+        self.lock = threading.RLock()
+
+    def document(self, entry, stamp=None):
+        """Read what the index keeps of a script; needs no lock."""
+        stamp = stamp or file_stamp(entry) or (None, None, None)
+        text = read_instructions(entry.path) if stamp[2] is not None else ""
+        meta = self.metadata.get(entry.path, stamp[0], stamp[1]) if self.metadata and stamp[0] is not None else None
+        meta = meta or {}
+        doc = {
+            "entry": entry,
+            "stamp": stamp,
+            "name": entry.name.lower(),
+            "folder": entry.folder.replace(os.sep, "/").lower(),
+            "meta": " ".join([meta.get("category", ""), " ".join(meta.get("tags", [])), meta.get("docstring", "")]).lower(),
+            "text": text.lower(),
+            "tags": set(meta.get("tags", [])),
+            "category": meta.get("category", "").lower(),
+            "words": {},
+        }
+        for field in FIELDS:
+            doc["words"][field] = set(words(doc[field]))
+        return doc
+
+    def add(self, entry, stamp=None):
+        self.insert(self.document(entry, stamp))
+
+    def insert(self, doc):
+        path = doc["entry"].path
+        for field in FIELDS:
+            field_words = doc["words"][field]
+            word_docs = self.word_docs[field]
+            for word in field_words:
+                paths = word_docs.get(word)
+                if paths is None:
+                    word_docs[word] = paths = set()
+                    if word not in self.vocab:
+                        self.vocab.add(word)
+                        self.match_cache.clear()
+                        for gram in word_grams(word):
+                            self.vocab_grams.setdefault(gram, set()).add(word)
+                paths.add(path)
+        self.docs[path] = doc
+
+    def remove(self, path, forget=True):
+        doc = self.docs.pop(path, None)
+        if doc is None:
+            return
+        if forget and self.metadata:
+            self.metadata.forget(path)
+        # Vocabulary words are kept; they are shared and cheap to leave behind
+        for field, field_words in doc["words"].items():
+            word_docs = self.word_docs[field]
+            for word in field_words:
+                paths = word_docs.get(word)
+                if paths is not None:
+                    paths.discard(path)
+                    if not paths:
+                        del word_docs[word]
+
+    def sync(self, entries, version=None):
+        """Bring the index in line with catalog entries, re-reading only changed scripts.
+
+        Files are stat'ed and read without the lock, so a sync on a worker
+        thread doesn't hold up searches on the main thread.
+        """
+        entries = list(entries)
+        stamps = [file_stamp(entry) for entry in entries]
+        changed = []
+        with self.lock:
+            for entry, stamp in zip(entries, stamps):
+                doc = self.docs.get(entry.path)
+                if doc is not None and doc["stamp"] == stamp:
+                    doc["entry"] = entry
+                else:
+                    changed.append((entry, stamp))
+        documents = [self.document(entry, stamp) for entry, stamp in changed]
+        with self.lock:
+            for doc in documents:
+                self.remove(doc["entry"].path, forget=False)
+                self.insert(doc)
+            seen = {entry.path for entry in entries}
+            for path in [p for p in self.docs if p not in seen]:
+                self.remove(path)
+            self.version = version
+
+    def matching_words(self, fragment):
+        """Vocabulary words containing a fragment (or starting with it, if short)."""
+        result = None
+        for gram in sorted(query_grams(fragment), key=lambda g: len(self.vocab_grams.get(g, ()))):
+            found = self.vocab_grams.get(gram)
+            if not found:
+                return set()
+            result = set(found) if result is None else result & found
+            if not result:
+                return set()
+        if len(fragment) < 3:
+            return result
+        return {word for word in result if fragment in word}
+
+    def word_matches(self, fragment):
+        """Vocabulary words matching a query fragment exactly or as a likely typo.
+
+        Returns {word: similarity}; exact substring hits score 1.0.
+        """
+        matches = self.match_cache.get(fragment)
+        if matches is not None:
+            return matches
+        matches = dict.fromkeys(self.matching_words(fragment), 1.0)
+        if len(fragment) >= 3:
+            query = word_grams(fragment)
+            shared = Counter()
+            for gram in query:
+                shared.update(self.vocab_grams.get(gram, ()))
+            for word, count in shared.items():
+                if word in matches:
+                    continue
+                similarity = 2.0 * count / (len(query) + len(word_grams(word)))
+                if similarity >= FUZZY_MIN_SIMILARITY:
+                    matches[word] = similarity * FUZZY_WEIGHT
+        if len(self.match_cache) > 1024:
+            self.match_cache.clear()
+        self.match_cache[fragment] = matches
+        return matches
+
+    def word_scores(self, fragment):
+        """Score each script matching a query word by its best field and match."""
+        matches = self.word_matches(fragment)
+        scores = {}
+        for field, field_score in (("text", TEXT_SCORE), ("meta", META_SCORE), ("folder", FOLDER_SCORE), ("name", NAME_SCORE)):
+            word_docs = self.word_docs[field]
+            for word, similarity in matches.items():
+                for path in word_docs.get(word, ()):
+                    score = field_score * similarity
+                    if field == "name" and self.docs[path]["name"].startswith(word):
+                        score *= 1.5
+                    if score > scores.get(path, 0.0):
+                        scores[path] = score
+        return scores
+
+    def facet_matches(self, filters):
+        paths = None
+        for facet, value in filters:
+            if facet == "tags":
+                found = {path for path, doc in self.docs.items() if value in doc["tags"]}
+            else:
+                found = {path for path, doc in self.docs.items() if doc["category"].startswith(value)}
+            paths = found if paths is None else paths & found
+        return paths
+
+    def search(self, query, limit=None):
+        """Return the best catalog entries matching every word and facet of the query."""
+        text, filters = split_query(query)
+        query_words = words(text)
+        if not query_words and not filters:
+            return []
+        with self.lock:
+            totals = None
+            if filters:
+                totals = dict.fromkeys(self.facet_matches(filters), 0.0)
+            for word in sorted(set(query_words), key=len, reverse=True):
+                if totals is not None and not totals:
+                    return []
+                scores = self.word_scores(word)
+                if totals is None:
+                    totals = scores
+                else:
+                    totals = {path: total + scores[path] for path, total in totals.items() if path in scores}
+            if not totals:
+                return []
+            key = lambda item: (-item[1], self.docs[item[0]]["name"])
+            if limit is not None and limit < len(totals):
+                ranked = heapq.nsmallest(limit, totals.items(), key=key)
+            else:
+                ranked = sorted(totals.items(), key=key)
+            return [self.docs[path]["entry"] for path, _ in ranked]
@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import uuid
+import socket
+import threading
+from contextlib import contextmanager
+
+# A claimed job whose heartbeat is older than this goes back to pending. Kept
+# generous: a long operator can hold Blender's GIL past several beats, and
+# hosts sharing the spool may disagree on the time a little
+STALE_AFTER = 600.0
+HEARTBEAT_INTERVAL = 30.0
+
+# Workers lost on the same job before it is marked failed instead of retried
+MAX_ATTEMPTS = 3
+
+STATES = ("pending", "claimed", "done", "failed")
+
+
+def worker_name():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class JobSpool:
+    """Batch jobs as JSON files in a shared folder, moved between state folders
+    by atomic renames so workers on any number of hosts can share it:
+
+        pending/<id>.json               waiting for a worker
+        claimed/<id>@<worker>.json      being run; its mtime is the heartbeat
+        done/<id>.json, failed/<id>.json    the job with its result
+
+    A job whose worker stops beating is handed out again, so every job runs
+    at least once but may, rarely, run twice. The heartbeat is a thread, so
+    an operator holding the GIL past STALE_AFTER stops it; a worker checks
+    still_claimed() before saving and leaves the file to the new owner if
+    the job was handed out meanwhile.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def folder(self, state):
+        return os.path.join(self.root, state)
+
+    def ensure(self):
+        for state in STATES + ("tmp",):
+            os.makedirs(self.folder(state), exist_ok=True)
+
+    def write(self, path, data):
+        # Written aside and renamed in, so no reader ever sees half a job
+        tmp_path = os.path.join(self.folder("tmp"), f"{os.path.basename(path)}.{worker_name()}")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp_path, path)
+
+    def read(self, path):
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def names(self, state):
+        try:
+            return sorted(name for name in os.listdir(self.folder(state)) if name.endswith(".json"))
+        except FileNotFoundError:
+            return []
+
+    def submit(self, jobs):
+        """Add jobs to pending, in order, and return their ids."""
+        self.ensure()
+        batch = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        ids = []
+        for index, job in enumerate(jobs):
+            job_id = f"{batch}-{index:05d}"
+            self.write(os.path.join(self.folder("pending"), job_id + ".json"),
+                       dict(job, id=job_id, attempts=0, submitted=time.time()))
+            ids.append(job_id)
+        return ids
+
+    def claim(self, worker):
+        """Take the oldest pending job: (job, claimed path), or None if there is none."""
+        for name in self.names("pending"):
+            claimed = os.path.join(self.folder("claimed"), f"{name[:-5]}@{worker}.json")
+            try:
+                os.rename(os.path.join(self.folder("pending"), name), claimed)
+            except OSError:
+                continue  # Another worker got there first
+            try:
+                os.utime(claimed)
+                return self.read(claimed), claimed
+            except (OSError, ValueError) as e:
+                print(f"Could not read claimed job {name}: {e}")
+        return None
+
+    def complete(self, job, claimed, result):
+        state = "done" if result["ok"] else "failed"
+        self.write(os.path.join(self.folder(state), job["id"] + ".json"),
+                   dict(job, result=result, finished=time.time()))
+        try:
+            os.remove(claimed)
+        except FileNotFoundError:
+            pass  # Given up on as stale meanwhile; this result still stands
+
+    def requeue_stale(self, stale_after=STALE_AFTER):
+        """Hand jobs of workers that stopped beating back out, or fail them
+        after MAX_ATTEMPTS. Returns the number of jobs recovered."""
+        recovered = 0
+        now = time.time()
+        for name in self.names("claimed"):
+            path = os.path.join(self.folder("claimed"), name)
+            try:
+                if now - os.stat(path).st_mtime < stale_after:
+                    continue
+            except FileNotFoundError:
+                continue
+            job_id, _, lost_worker = name[:-5].partition("@")
+            # Renamed away first, so only one worker recovers the job
+            recovering = os.path.join(self.folder("tmp"), f"{name}.{worker_name()}")
+            try:
+                os.rename(path, recovering)
+                job = self.read(recovering)
+            except (OSError, ValueError):
+                continue
+            job["attempts"] = job.get("attempts", 0) + 1
+            job.setdefault("lost_workers", []).append(lost_worker)
+            if job["attempts"] >= MAX_ATTEMPTS:
+                result = {"blend": job.get("blend", ""), "ok": False, "saved": False, "steps": [],
+                          "error": f"Gave up after {job['attempts']} workers stopped responding"}
+                self.write(os.path.join(self.folder("failed"), job_id + ".json"),
+                           dict(job, result=result, finished=now))
+            else:
+                self.write(os.path.join(self.folder("pending"), job_id + ".json"), job)
+            os.remove(recovering)
+            recovered += 1
+        return recovered
+
+    def counts(self):
+        return {state: len(self.names(state)) for state in STATES}
+
+    def finished(self):
+        """Every done and failed job with its result, oldest first."""
+        jobs = []
+        for state in ("done", "failed"):
+            for name in self.names(state):
+                try:
+                    jobs.append(self.read(os.path.join(self.folder(state), name)))
+                except (OSError, ValueError):
+                    continue
+        return sorted(jobs, key=lambda job: job["id"])
+
+
+def still_claimed(claimed):
+    """Beat once, and tell whether the job is still this worker's. False once
+    it was given up on as stale and handed out again, when whatever it would
+    write may clash with the worker that has it now."""
+    try:
+        os.utime(claimed)
+    except FileNotFoundError:
+        return False
+    except OSError:
+        pass  # Can't tell; the job file is still there as far as we know
+    return True
+
+
+@contextmanager
+def heartbeat(claimed, interval=HEARTBEAT_INTERVAL):
+    """Touch a claimed job file every interval seconds while the block runs."""
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            try:
+                os.utime(claimed)
+            except FileNotFoundError:
+                return  # Recovered by another worker; finish anyway
+            except OSError as e:
+                print(f"Heartbeat failed for {os.path.basename(claimed)}: {e}")
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
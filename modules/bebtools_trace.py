@@ -0,0 +1,126 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+
+
+def operator_name(op):
+    # bpy.ops.object.empty_add -> "object.empty_add"
+    module = getattr(op, "_module", None)
+    func = getattr(op, "_func", None)
+    if module and func:
+        return f"{module}.{func}"
+    return repr(op)
+
+
+class OpsTracer:
+    """Times every bpy.ops call made while tracing, nested inside script spans,
+    and writes them as Chrome trace_event JSON (chrome://tracing, Perfetto).
+
+    Tracing swaps __call__ on Blender's operator wrapper class, so it costs
+    nothing when off. Calls made inside pause() (Beb.Tools' own undo pushes
+    and saves between scripts) are left out.
+    """
+
+    def __init__(self):
+        self.op_class = None
+        self.original_call = None
+        self.name = ""
+        self.events = []
+        self.totals = {}  # operator -> [calls, total seconds, self seconds]
+        self.children = []  # stack of time spent in nested operator calls
+        self.origin = 0.0
+        self.paused = 0
+
+    @property
+    def active(self):
+        return self.op_class is not None
+
+    def start(self, op_class, name):
+        if self.active:
+            return
+        self.name = name
+        self.events = []
+        self.totals = {}
+        self.children = []
+        self.origin = time.perf_counter()
+        self.op_class = op_class
+        self.original_call = op_class.__call__
+        original = self.original_call
+        tracer = self
+
+        def traced_call(op, *args, **kwargs):
+            if tracer.paused:
+                return original(op, *args, **kwargs)
+            start = time.perf_counter()
+            tracer.children.append(0.0)
+            try:
+                return original(op, *args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                nested = tracer.children.pop()
+                if tracer.children:
+                    tracer.children[-1] += end - start
+                tracer.add(operator_name(op), "bpy.ops", start, end, end - start - nested)
+
+        op_class.__call__ = traced_call
+
+    def stop(self):
+        if self.active:
+            self.op_class.__call__ = self.original_call
+            self.op_class = None
+            self.original_call = None
+
+    def add(self, name, category, start, end, own=None):
+        self.events.append({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - self.origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": 1,
+            "tid": 1,
+        })
+        if own is not None:
+            total = self.totals.setdefault(name, [0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += end - start
+            total[2] += own
+
+    @contextmanager
+    def pause(self):
+        self.paused += 1
+        try:
+            yield
+        finally:
+            self.paused -= 1
+
+    @contextmanager
+    def span(self, name, category="script"):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, category, start, time.perf_counter())
+
+    def top(self, count=5):
+        """(operator, calls, self seconds) of the operators with the most own time."""
+        ranked = sorted(self.totals.items(), key=lambda item: item[1][2], reverse=True)
+        return [(name, calls, own) for name, (calls, total, own) in ranked[:count]]
+
+    def write(self, directory):
+        """Save the trace as <name>-<time>.json in directory and return its path."""
+        os.makedirs(directory, exist_ok=True)
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in self.name) or "trace"
+        path = os.path.join(directory, f"{safe_name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        operators = {
+            name: {"calls": calls, "total_ms": total * 1000, "self_ms": own * 1000}
+            for name, (calls, total, own) in self.totals.items()
+        }
+        with open(path, "w") as f:
+            json.dump({
+                "traceEvents": [{"name": "thread_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": self.name}}] + self.events,
+                "displayTimeUnit": "ms",
+                "otherData": {"operators": operators},
+            }, f)
+        return path
@@ -2,15 +2,27 @@ import bpy
 import os
 from bpy.types import Panel, UIList, Operator
 from bpy.props import StringProperty, CollectionProperty
-from .bebtools_utils import SCRIPTS_DIR, get_scripts, update_info_text
+from .bebtools_utils import (
+    SCRIPTS_DIR, SEARCH_LIMIT, get_scripts, update_info_text, tag_redraw_view3d, scripts_loading,
+    search_index, ensure_search_index, list_view, sync_script_list, show_search_results, library,
+    queue_run, queue_eta, performance_summary, restore_point, journal, request_info_lines, metadata,
+)
+from .bebtools_importer import folder_sources, plan_import, write_files
 
 import requests
 import shutil
 from urllib.parse import unquote
-import zipfile
-import tempfile
 
 class BEBTOOLS_UL_ScriptList(UIList):
+    def filter_items(self, context, data, propname):
+        # The collection holds the whole catalog; show the current folder or the search hits
+        wm = context.window_manager
+        items = getattr(data, propname)
+        if len(items) != len(list_view.rows):
+            return [self.bitflag_filter_item] * len(items), []
+        return list_view.filter(wm.bebtools_current_dir or library.top, library.top, self.bitflag_filter_item,
+                                library.version)
+
     def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
         row = layout.row(align=False)
         row.alignment = 'LEFT'
@@ -89,47 +101,30 @@ class BEBTOOLS_OT_ImportScript(Operator):
         return {'RUNNING_MODAL'}
 
     def process_folder(self, folder_path, imported_files):
-        """Recursively process a folder for .py, .txt, and .zip files."""
-        for root, dirs, files in os.walk(folder_path):
-            for filename in files:
-                filepath = os.path.join(root, filename)
-                name, ext = os.path.splitext(filename)
-
-                if ext.lower() == '.zip':
-                    # Handle .zip files
-                    try:
-                        with tempfile.TemporaryDirectory() as temp_dir:
-                            with zipfile.ZipFile(filepath, 'r') as zip_ref:
-                                zip_ref.extractall(temp_dir)
-                            # Recursively process the unzipped contents
-                            self.process_folder(temp_dir, imported_files)
-                    except zipfile.BadZipFile:
-                        self.report({'WARNING'}, f"Skipped bad .zip file: {filename}")
-                    except Exception as e:
-                        self.report({'ERROR'}, f"Error with {filename}: {str(e)}")
-                        return False
-
-                elif ext.lower() in ('.py', '.txt'):
-                    # Handle .py and .txt files
-                    dest_path = os.path.join(SCRIPTS_DIR, filename)
-                    try:
-                        if os.path.exists(dest_path):
-                            os.remove(dest_path)  # Overwrite existing files
-                        shutil.copy2(filepath, dest_path)
-                        if ext.lower() == '.py':
-                            imported_files.add(name)  # Track unique script names
-                            # Ensure a .txt exists for each .py
-                            txt_path = os.path.join(SCRIPTS_DIR, f"{name}.txt")
-                            if not os.path.exists(txt_path):
-                                with open(txt_path, "w") as f:
-                                    f.write(f"Notes for {name}\n")
-                    except Exception as e:
-                        self.report({'ERROR'}, f"Couldn’t add {filename}: {str(e)}")
-                        return False
-        return True
+        """Import the .py and .txt files below a folder and inside its .zip files.
+
+        Archives are read in place, nested ones in memory. Only files that
+        differ from the library's copies are written, several at a time.
+        Returns the number of files written, or None on failure.
+        """
+        bad_zips = []
+        try:
+            writes, scripts = plan_import(folder_sources(folder_path, bad_zips), SCRIPTS_DIR, metadata.content_hash)
+        except Exception as e:
+            self.report({'ERROR'}, f"Error reading {folder_path}: {str(e)}")
+            return None
+        metadata.save()
+        for filename in bad_zips:
+            self.report({'WARNING'}, f"Skipped bad .zip file: {filename}")
+        failures = write_files(writes)
+        for path, error in failures:
+            self.report({'ERROR'}, f"Couldn’t add {os.path.basename(path)}: {str(error)}")
+        if failures:
+            return None
+        imported_files.update(scripts)  # Track unique script names
+        return len(writes)
 
     def execute(self, context):
-        from .bebtools_utils import SCRIPTS_DIR
         wm = context.window_manager
         imported_files = set()  # Track unique script names (without extensions)
 
@@ -138,17 +133,20 @@ class BEBTOOLS_OT_ImportScript(Operator):
             return {'CANCELLED'}
 
         # Process the selected folder recursively
-        success = self.process_folder(self.directory, imported_files)
+        written = self.process_folder(self.directory, imported_files)
 
-        if not success:
+        if written is None:
             return {'CANCELLED'}
 
         if imported_files:
-            # Refresh the script list
-            bpy.ops.bebtools.init_scripts('INVOKE_DEFAULT', directory=SCRIPTS_DIR)
-            wm.bebtools_active_index = -1
-            update_info_text(context)
-            self.report({'INFO'}, f"Added {len(imported_files)} script(s) from your folder!")
+            if written:
+                # Refresh the script list
+                bpy.ops.bebtools.init_scripts('INVOKE_DEFAULT', directory=SCRIPTS_DIR)
+                wm.bebtools_active_index = -1
+                update_info_text(context)
+                self.report({'INFO'}, f"Added {len(imported_files)} script(s) from your folder! ({written} file(s) new or changed)")
+            else:
+                self.report({'INFO'}, f"All {len(imported_files)} script(s) from your folder are already up to date")
             return {'FINISHED'}
         else:
             self.report({'WARNING'}, "No scripts (.py, .txt, or .zip) found in the folder!")
@@ -188,19 +186,11 @@ class BEBTOOLS_OT_NavigateBack(Operator):
 
     def execute(self, context):
         wm = context.window_manager
-        from .bebtools_utils import SCRIPTS_DIR
         if self.index >= 0 and self.index < len(wm.bebtools_scripts):
             script_item = wm.bebtools_scripts[self.index]
             if script_item.name == "Back":
                 parent_path = script_item.path
                 get_scripts(parent_path)
-                if parent_path != SCRIPTS_DIR:
-                    grandparent_path = os.path.dirname(parent_path)
-                    back_item = wm.bebtools_scripts.add()
-                    back_item.name = "Back"
-                    back_item.path = grandparent_path
-                    back_item.is_folder = True
-                    wm.bebtools_scripts.move(len(wm.bebtools_scripts) - 1, 0)
                 wm.bebtools_active_index = -1
                 wm.bebtools_current_dir = parent_path
                 update_info_text(context)
@@ -344,9 +334,15 @@ class BEBTOOLS_PT_Panel(Panel):
         wm = context.window_manager
 
         if not wm.bebtools_scripts:
-            layout.operator("bebtools.init_scripts", text="Load Scripts")
-            wm.bebtools_current_dir = SCRIPTS_DIR
+            if scripts_loading():
+                layout.label(text="Loading scripts...", icon="TIME")
+            else:
+                layout.operator("bebtools.init_scripts", text="Load Scripts")
+                wm.bebtools_current_dir = library.top
         else:
+            if scripts_loading():
+                # The rows loaded so far stay usable below
+                layout.label(text="Loading scripts...", icon="TIME")
             parent_row = layout.row(align=True)
             
             left_row = parent_row.row(align=True)
@@ -356,6 +352,8 @@ class BEBTOOLS_PT_Panel(Panel):
             
             center_row = parent_row.row(align=True)
             center_row.prop(wm, "bebtools_search_query", text="", icon="VIEWZOOM", emboss=True)
+            if wm.bebtools_search_active:
+                center_row.operator("bebtools.queue_results", text="", icon="FORWARD")
             
             right_row = parent_row.row(align=True)
             right_row.alignment = 'RIGHT'
@@ -438,11 +436,77 @@ class BEBTOOLS_PT_QueuePanel(Panel):
             "bebtools_queue_index",
             rows=5
         )
+        if queue_run["running"]:
+            done, total = queue_run["done"], queue_run["total"]
+            eta = queue_eta()
+            text = f"{done}/{total}  {queue_run['current']}"
+            if eta is not None:
+                text += f"  ~{int(eta // 60)}:{int(eta % 60):02d} left"
+            row = layout.row(align=True)
+            row.progress(factor=done / total if total else 0.0, type='BAR', text=text)
+            row.operator("bebtools.cancel_queue", text="", icon="CANCEL")
+            return
         row = layout.row(align=True)
         row.operator("bebtools.move_up", text="", icon="TRIA_UP_BAR")
         row.operator("bebtools.move_down", text="", icon="TRIA_DOWN_BAR")
         row.operator("bebtools.multi_run", text="Run All", icon="PLAY")
+        row.prop(wm, "bebtools_incremental", text="", icon="FILE_REFRESH")
         row.operator("bebtools.clear_queue", text="", icon="X")
+        if journal.resumable():
+            done, total = journal.next_index, len(journal.data["items"])
+            layout.operator("bebtools.resume_queue", text=f"Resume Queue ({done}/{total} done)", icon="RECOVER_LAST")
+        row = layout.row(align=True)
+        row.prop(wm, "bebtools_undo_mode", text="Undo")
+        if wm.bebtools_undo_mode == 'NONE':
+            row.prop(wm, "bebtools_restore_point", text="", icon="FILE_BACKUP")
+        row = layout.row(align=True)
+        row.prop(wm, "bebtools_checkpoint_steps", text="Checkpoint Every")
+        row.prop(wm, "bebtools_checkpoint_minutes", text="Min")
+        if wm.bebtools_incremental:
+            layout.prop(wm, "bebtools_snapshot_steps", text="Snapshot Every")
+        if restore_point["path"]:
+            layout.operator("bebtools.revert_restore_point", icon="LOOP_BACK")
+
+class BEBTOOLS_PT_PerformancePanel(Panel):
+    bl_label = "Performance"
+    bl_idname = "BEBTOOLS_PT_performance_panel"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Beb.Tools"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw_header(self, context):
+        layout = self.layout
+        layout.label(text="", icon="TIME")
+
+    def draw(self, context):
+        layout = self.layout
+        wm = context.window_manager
+        row = layout.row(align=True)
+        row.prop(wm, "bebtools_profile_runs")
+        row.prop(wm, "bebtools_trace_ops")
+        layout.prop(wm, "bebtools_track_memory")
+
+        summary = performance_summary()
+        if not summary:
+            layout.label(text="No runs recorded yet")
+            return
+        layout.label(text="Slowest scripts (recent average):")
+        for path, seconds, runs, spots in summary:
+            box = layout.box()
+            row = box.row(align=True)
+            row.label(text=os.path.splitext(os.path.basename(path))[0], icon="FILE_SCRIPT")
+            row.label(text=f"{seconds * 1000:.0f} ms x{runs}")
+            if spots:
+                for label, own, calls in spots:
+                    box.label(text=f"{own * 1000:.1f} ms  {calls}x  {label}")
+                row = box.row(align=True)
+                op = row.operator("bebtools.export_profile", text="pstats", icon="EXPORT")
+                op.script_path = path
+                op.format = 'PSTATS'
+                op = row.operator("bebtools.export_profile", text="Speedscope", icon="EXPORT")
+                op.script_path = path
+                op.format = 'SPEEDSCOPE'
 
 class BEBTOOLS_PT_SupportPanel(Panel):
     bl_label = "Support"
@@ -478,26 +542,13 @@ class BEBTOOLS_OT_SearchScripts(Operator):
                 self.report({'INFO'}, "Returned to folder browsing")
             return {'FINISHED'}
 
-        # Perform recursive search
-        wm.bebtools_scripts.clear()
-        matches = []
-        for root, _, files in os.walk(SCRIPTS_DIR):
-            for file in files:
-                if file.endswith(".py") and not file.startswith("__"):
-                    script_name = file[:-3]  # Just the name without .py
-                    if query in script_name.lower():
-                        full_path = os.path.join(root, file)
-                        matches.append((script_name, full_path, False))  # Use script_name only
-
-        # Sort matches alphabetically
-        matches.sort(key=lambda x: x[0])
-
-        # Populate script list with results
-        for name, path, is_folder in matches:
-            item = wm.bebtools_scripts.add()
-            item.name = name  # Only the script name, no path
-            item.path = path  # Full path still stored for operations
-            item.is_folder = is_folder
+        # Catch up with disk changes once per search session, not per keystroke
+        ensure_search_index(refresh=not wm.bebtools_search_active)
+        matches = search_index.search(query, limit=SEARCH_LIMIT)
+
+        # Show the ranked results by filtering the catalog list; no items are rebuilt
+        sync_script_list()
+        show_search_results(matches)
 
         wm.bebtools_search_active = True
         wm.bebtools_active_index = -1
@@ -505,9 +556,7 @@ class BEBTOOLS_OT_SearchScripts(Operator):
         self.report({'INFO'}, f"Found {len(matches)} script(s) matching '{query}'")
         
         # Redraw the UI
-        for area in context.screen.areas:
-            if area.type == 'VIEW_3D':
-                area.tag_redraw()
+        tag_redraw_view3d()
         return {'FINISHED'}
 
 class BEBTOOLS_OT_ClearSearch(Operator):
@@ -572,14 +621,24 @@ class BEBTOOLS_PT_InfoPanel(Panel):
 class BEBTOOLS_UL_InfoText(UIList):
     def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
         layout.label(text=item.name)
+        request_info_lines(index)
+
+class BEBTOOLS_UL_LibraryRoots(UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        row = layout.row(align=True)
+        row.prop(item, "name", text="", emboss=False, icon="FILE_FOLDER")
+        row.prop(item, "path", text="")
+        row.prop(item, "read_only", text="", icon="LOCKED" if item.read_only else "UNLOCKED")
 
 classes = (
     BEBTOOLS_UL_ScriptList,
     BEBTOOLS_UL_QueueList,
     BEBTOOLS_UL_InfoText,
+    BEBTOOLS_UL_LibraryRoots,
     BEBTOOLS_PT_Panel,
     BEBTOOLS_PT_InfoPanel,
     BEBTOOLS_PT_QueuePanel,
+    BEBTOOLS_PT_PerformancePanel,
     BEBTOOLS_PT_SupportPanel,
     BEBTOOLS_OT_ScriptContextMenu,
     BEBTOOLS_OT_QueueContextMenu,
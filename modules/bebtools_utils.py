@@ -1,80 +1,654 @@
 import bpy
 import os
+import time
+import json
+import tempfile
+import pstats
+import cProfile
+import threading
+from .bebtools_catalog import CACHE_DIR
+from .bebtools_library import ScriptLibrary
+from .bebtools_search import SearchIndex
+from .bebtools_metadata import MetadataCache
+from .bebtools_runner import CodeCache, ScriptModules, is_module_script
+from .bebtools_history import RunHistory, hotspots
+from .bebtools_trace import OpsTracer
+from .bebtools_memory import MemoryTracker, format_bytes
+from .bebtools_journal import RunJournal
+from .bebtools_incremental import IncrementalCache, SceneFingerprint, block_key, step_cacheable
+from .bebtools_listsync import sync_collection, ScriptListView, SCRIPT_FIELDS
+from .bebtools_infotext import InstructionCache
 
 MODULES_DIR = os.path.join(os.path.dirname(__file__), "..", "modules")
 SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), "..", "scripts")
 
-def get_scripts(directory=SCRIPTS_DIR, expand=False):
+# Package name the add-on is registered under, for its preferences
+ADDON_ID = __package__.rpartition(".")[0]
+
+# Every script root with its own on-disk catalog; listings and walks go through it.
+# Starts with the bundled scripts only, apply_library_roots() adds the configured ones
+library = ScriptLibrary(CACHE_DIR)
+library.set_roots([(SCRIPTS_DIR, "Beb.Tools", False)])
+
+# Docstring, frontmatter and bpy.ops usage parsed from each script, cached by content hash
+metadata = MetadataCache(os.path.join(CACHE_DIR, "metadata.json"))
+
+# Compiled scripts, in memory and marshalled under cache/bytecode
+code_cache = CodeCache(os.path.join(CACHE_DIR, "bytecode"))
+
+# Scripts with register() and run(context, **params), imported once each
+script_modules = ScriptModules(code_cache)
+
+# Wall time of every script run, for queue ETAs
+history = RunHistory(os.path.join(CACHE_DIR, "history.sqlite"))
+
+# In-memory search index over the library, kept in step by ensure_search_index()
+search_index = SearchIndex(metadata)
+
+# Number of list items created per timer tick while applying a background scan
+LOAD_BATCH_SIZE = 1000
+
+# Seconds to wait after the last keystroke before evaluating a search
+SEARCH_DEBOUNCE = 0.15
+
+# Maximum number of ranked search results shown in the list
+SEARCH_LIMIT = 200
+
+# Seconds between checks for changes made outside Blender (git pulls, sync tools);
+# most polls only check the shown folder, every WATCH_FULL_EVERY-th the whole library
+WATCH_INTERVAL = 2.0
+WATCH_FULL_EVERY = 15
+
+# Row 0 of the script list; its path is pointed at the parent of the shown folder
+BACK_ROW = ("Back", "", True, None)
+
+# Filter state for BEBTOOLS_UL_ScriptList, mirroring wm.bebtools_scripts row for row
+list_view = ScriptListView()
+
+# Parsed instructions of recently shown scripts
+instructions = InstructionCache()
+
+# Lines of the shown instructions; rows are built INFO_BATCH at a time, more
+# as the info list is scrolled to the last built one
+INFO_BATCH = 40
+_info = {"lines": [], "shown": 0}
+
+# State shared between the background scan thread and the main-thread timer
+_async_load = {"thread": None, "directory": None, "rows": None, "version": None, "cursor": 0}
+
+# Scripts still to be compiled ahead of their first run
+_prewarm = {"pending": []}
+
+# Opt-in timing of bpy.ops calls made by running scripts; one trace file per run
+ops_tracer = OpsTracer()
+TRACE_DIR = os.path.join(CACHE_DIR, "traces")
+
+# Copy of the .blend saved before a run in the no-undo mode, for one-click revert
+RESTORE_DIR = os.path.join(tempfile.gettempdir(), "bebtools_restore")
+restore_point = {"path": None, "source": "", "taken": 0.0}
+
+# Progress of the last queue run and its .blend checkpoints, to resume after a crash
+journal = RunJournal(os.path.join(CACHE_DIR, "journal.json"))
+CHECKPOINT_PATH = os.path.join(CACHE_DIR, "checkpoints", "queue-checkpoint.blend")
+
+# Outcomes of queue scripts by input scene and code, with .blend snapshots of the
+# states between them, so reruns skip what didn't change
+incremental = IncrementalCache(os.path.join(CACHE_DIR, "incremental"))
+_incremental = {"fingerprint": None, "updated": set()}
+
+# Slowest scripts and their hotspots as shown in the Performance panel,
+# rebuilt only after new runs were recorded
+_performance = {"version": None, "rows": []}
+
+# Progress of the running queue, read by the Queue panel
+queue_run = {"running": False, "done": 0, "first": 0, "total": 0, "current": "", "started": 0.0, "expected": [], "cancelled": False}
+
+# State of the library watcher's background check
+_watch = {"thread": None, "polls": 0}
+
+def addon_preferences():
+    addon = bpy.context.preferences.addons.get(ADDON_ID)
+    return addon.preferences if addon else None
+
+def library_roots():
+    """(path, label, read_only) for each root in the preferences, in precedence
+    order, followed by the bundled scripts folder."""
+    roots = []
+    prefs = addon_preferences()
+    if prefs:
+        for root in prefs.library_roots:
+            if root.path.strip():
+                roots.append((os.path.normpath(bpy.path.abspath(root.path)), root.name, root.read_only))
+    roots.append((SCRIPTS_DIR, "Beb.Tools", False))
+    return roots
+
+def apply_library_roots():
+    """Point the library at the configured roots. Returns True if they changed."""
+    generation = library.generation
+    library.set_roots(library_roots())
+    return library.generation != generation
+
+def reload_library_roots(self=None, context=None):
+    # Also the update callback of the library root preferences
+    if apply_library_roots():
+        bpy.context.window_manager.bebtools_current_dir = library.top
+        load_scripts_async()
+
+def refuse_read_only(operator, path):
+    """Report and return True if path lies in a read-only library root."""
+    if library.is_read_only(path):
+        operator.report({'WARNING'}, f"'{library.root_of(path)}' is a read-only library")
+        return True
+    return False
+
+def get_scripts(directory=None):
+    """Show a directory in the script list, with a Back entry below the root.
+
+    The list holds the whole catalog; showing a folder only revalidates that
+    folder, syncs whatever changed and lets the UIList filter do the rest.
+    """
+    cancel_scripts_load()  # A direct listing supersedes any pending background load
+    directory = directory or library.top
+    refresh_script_list(directory)
+    list_view.set_results(None)
+    wm = bpy.context.window_manager
+    if wm.bebtools_scripts:
+        wm.bebtools_scripts[0].path = library.parent_of(directory)  # Back
+    print(f"Loaded directory: {directory}, {len(list_view.rows)} catalog item(s)")
+
+def refresh_script_list(directory):
+    """Revalidate one folder and sync any change into the list, keeping the view."""
+    library.refresh(directory, recursive=False)
+    library.save()
+    return sync_script_list()
+
+def sync_script_list():
+    """Bring wm.bebtools_scripts in line with the library if it changed."""
+    if scripts_loading():
+        return 0  # The background load is still adding its rows
     wm = bpy.context.window_manager
-    if not expand:
+    collection = wm.bebtools_scripts
+    version = library.version
+    if list_view.version == version and len(collection) == len(list_view.rows):
+        return 0
+    # Only get_scripts() moves the Back entry; a sync keeps where it leads
+    back_path = collection[0].path if len(collection) else BACK_ROW[1]
+    rows = [BACK_ROW[:1] + (back_path,) + BACK_ROW[2:]] + library.rows()
+    current = None
+    if len(collection) == len(list_view.rows):
+        current = [row[:3] for row in list_view.rows]
+        if current:
+            current[0] = tuple(getattr(collection[0], field) for field in SCRIPT_FIELDS)
+    active = wm.bebtools_active_index
+    active_path = collection[active].path if 0 < active < len(collection) else None
+    operations = sync_collection(collection, [row[:3] for row in rows], current=current)
+    list_view.set_rows(rows, version)
+    if active_path is not None:
+        # Items may have moved; keep the same script selected
+        index = list_view.index_of.get(active_path, -1)
+        if index != active:
+            wm.bebtools_active_index = index
+    return operations
+
+def show_search_results(entries):
+    list_view.set_results([entry.path for entry in entries])
+
+def scripts_loading():
+    return _async_load["directory"] is not None
+
+def _scan_worker(directory):
+    # Pure filesystem work; never touches bpy from this thread
+    try:
+        library.refresh()
+        library.save()
+        version = library.version
+        rows = [BACK_ROW] + library.rows()
+        ensure_search_index()
+    except OSError as e:
+        print(f"Background script scan failed: {e}")
+        rows, version = [BACK_ROW], None
+    if _async_load["directory"] == directory:
+        _async_load["version"] = version
+        _async_load["rows"] = rows
+
+def load_scripts_async(directory=None):
+    """Scan in a worker thread, then fill the list in batches from a timer."""
+    cancel_scripts_load()
+    directory = directory or library.top
+    _async_load["directory"] = directory
+    _async_load["rows"] = None
+    _async_load["cursor"] = 0
+    thread = threading.Thread(target=_scan_worker, args=(directory,), daemon=True)
+    _async_load["thread"] = thread
+    thread.start()
+    bpy.app.timers.register(_apply_scripts_timer, first_interval=0.05)
+    tag_redraw_view3d()
+
+def cancel_scripts_load():
+    _async_load["directory"] = None
+    _async_load["rows"] = None
+    if bpy.app.timers.is_registered(_apply_scripts_timer):
+        bpy.app.timers.unregister(_apply_scripts_timer)
+
+def _apply_scripts_timer():
+    directory = _async_load["directory"]
+    if directory is None:
+        return None
+    rows = _async_load["rows"]
+    if rows is None:
+        return 0.1  # Worker still scanning
+    wm = bpy.context.window_manager
+    cursor = _async_load["cursor"]
+    batch = rows[cursor:cursor + LOAD_BATCH_SIZE]
+    if cursor == 0:
         wm.bebtools_scripts.clear()
-    items = []
-    for filename in os.listdir(directory):
-        full_path = os.path.join(directory, filename)
-        if os.path.isdir(full_path):
-            item = wm.bebtools_scripts.add()
-            item.name = filename
-            item.path = full_path
-            item.is_folder = True
-            items.append(item)
-        elif filename.endswith(".py") and not filename.startswith("__"):
-            item = wm.bebtools_scripts.add()
-            item.name = filename[:-3]
-            item.path = full_path
-            item.is_folder = False
-            items.append(item)
-    folders = sorted(
-        [(item.name, item.path, item.is_folder) for item in wm.bebtools_scripts if item.is_folder and item.name != "Back"],
-        key=lambda x: x[0]
-    )
-    scripts = sorted(
-        [(item.name, item.path, item.is_folder) for item in wm.bebtools_scripts if not item.is_folder],
-        key=lambda x: x[0]
-    )
-    wm.bebtools_scripts.clear()
-    for item in items:
-        if item.name == "Back":
-            new_item = wm.bebtools_scripts.add()
-            new_item.name = item.name
-            new_item.path = item.path
-            new_item.is_folder = item.is_folder
-    for name, path, is_folder in folders:
-        new_item = wm.bebtools_scripts.add()
-        new_item.name = name
-        new_item.path = path
-        new_item.is_folder = is_folder
-    for name, path, is_folder in scripts:
-        new_item = wm.bebtools_scripts.add()
-        new_item.name = name
-        new_item.path = path
-        new_item.is_folder = is_folder
-    print(f"Loaded directory: {directory}, List: {[item.name for item in wm.bebtools_scripts]}")
-    return items
+        list_view.set_rows([], None)
+        list_view.set_results(None)
+        wm.bebtools_active_index = -1
+        wm.bebtools_current_dir = directory
+    for name, path, is_folder, _ in batch:
+        item = wm.bebtools_scripts.add()
+        item.name = name
+        item.path = path
+        item.is_folder = is_folder
+    # The rows added so far are shown (filtered to the folder) while the rest load
+    list_view.add_rows(batch)
+    if cursor == 0:
+        wm.bebtools_scripts[0].path = library.parent_of(directory)  # Back
+    cursor += LOAD_BATCH_SIZE
+    _async_load["cursor"] = cursor
+    if cursor < len(rows):
+        tag_redraw_view3d()
+        return 0.01
+    _async_load["directory"] = None
+    _async_load["rows"] = None
+    list_view.version = _async_load["version"]
+    update_info_text(bpy.context)
+    schedule_prewarm()
+    print(f"Loaded catalog in background: {len(rows) - 1} item(s)")
+    tag_redraw_view3d()
+    return None
+
+def _watch_worker(directory, full):
+    # Stats directories only; a folder is re-listed just when its mtime moved
+    try:
+        library.refresh(None if full else directory, recursive=full)
+        library.save()
+        ensure_search_index()
+    except OSError as e:
+        print(f"Library watcher failed: {e}")
+
+def watch_library_timer():
+    """Poll the library for changes made outside Blender and apply only those."""
+    prefs = addon_preferences()
+    interval = prefs.watch_interval if prefs else WATCH_INTERVAL
+    if prefs and not prefs.watch_library:
+        return interval
+    thread = _watch["thread"]
+    if thread is not None and thread.is_alive():
+        return interval  # A slow share is still being checked
+    wm = bpy.context.window_manager
+    if scripts_loading() or not wm.bebtools_scripts:
+        return interval
+    if sync_script_list():
+        if wm.bebtools_search_active:
+            schedule_search(wm, bpy.context)  # Re-rank the shown results
+        tag_redraw_view3d()
+    _watch["polls"] += 1
+    full = _watch["polls"] % WATCH_FULL_EVERY == 0
+    thread = threading.Thread(target=_watch_worker, args=(wm.bebtools_current_dir or library.top, full), daemon=True)
+    _watch["thread"] = thread
+    thread.start()
+    return interval
+
+def start_watching():
+    if not bpy.app.timers.is_registered(watch_library_timer):
+        bpy.app.timers.register(watch_library_timer, first_interval=WATCH_INTERVAL, persistent=True)
+
+def stop_watching():
+    if bpy.app.timers.is_registered(watch_library_timer):
+        bpy.app.timers.unregister(watch_library_timer)
+
+def queue_params(item):
+    """Parameters a queue item passes to its script's run()."""
+    try:
+        return json.loads(item.params) if item.params else {}
+    except ValueError:
+        print(f"Ignoring malformed parameters of {item.name}: {item.params}")
+        return {}
+
+def run_script(path, namespace, context=None, params=None):
+    """Run a script from its cached code object.
+
+    Module-style scripts are imported once and only their run() is called;
+    legacy scripts are executed in namespace as before. The wall time, and a
+    cProfile capture or memory deltas when enabled, go to the run history.
+    Returns warnings about the run, such as leaked orphan datablocks.
+    """
+    context = context or bpy.context
+    wm = context.window_manager
+    code_cache.count_run(path)
+    if is_module_script(metadata.get(path)):
+        call = lambda: script_modules.run(path, context, params)
+    else:
+        code = code_cache.get(path)  # Compiling isn't part of the script's time
+        call = lambda: exec(code, namespace)
+    if ops_tracer.active:
+        traced = call
+        def call():
+            with ops_tracer.span(os.path.splitext(os.path.basename(path))[0]):
+                traced()
+    profiler = cProfile.Profile() if wm.bebtools_profile_runs else None
+    tracker = MemoryTracker(bpy.data) if wm.bebtools_track_memory else None
+    if tracker:
+        tracker.start()
+    started = time.time()
+    clock = time.perf_counter()
+    error = ""
+    memory = None
+    try:
+        if profiler:
+            profiler.runcall(call)
+        else:
+            call()
+    except Exception as e:
+        error = str(e) or type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - clock
+        stats = pstats.Stats(profiler).stats if profiler else None
+        if tracker:
+            memory = tracker.finish()
+            print(f"Memory after {os.path.basename(path)}: {format_bytes(memory['python_bytes'])} kept, "
+                  f"{format_bytes(memory['peak_bytes'])} peak, datablocks {memory['datablocks'] or 'unchanged'}")
+        history.record(path, started, duration, error, stats, memory)
+    return memory["flags"] if memory else []
+
+def internal_op(op, **kwargs):
+    # Beb.Tools' own saves, undo pushes and searches aren't the script's calls; keep them out of ops traces
+    with ops_tracer.pause():
+        return op(**kwargs)
+
+def begin_run(context):
+    """Get ready for a run under the chosen undo mode: without undo, save a
+    restore point first if asked to. Returns False if that failed."""
+    wm = context.window_manager
+    if wm.bebtools_undo_mode != 'NONE' or not wm.bebtools_restore_point:
+        return True
+    source = bpy.data.filepath
+    name = os.path.splitext(os.path.basename(source))[0] if source else "untitled"
+    path = os.path.join(RESTORE_DIR, f"{name}-restore.blend")
+    try:
+        os.makedirs(RESTORE_DIR, exist_ok=True)
+        internal_op(bpy.ops.wm.save_as_mainfile, filepath=path, copy=True, check_existing=False)
+    except (OSError, RuntimeError) as e:
+        print(f"Could not save restore point: {e}")
+        return False
+    restore_point.update(path=path, source=source, taken=time.time())
+    return True
+
+def push_undo(context, label):
+    """Add an undo step, unless running without undo."""
+    if context.window_manager.bebtools_undo_mode == 'NONE':
+        return
+    try:
+        internal_op(bpy.ops.ed.undo_push, message=f"Beb.Tools: {label}")
+    except RuntimeError as e:
+        print(f"Could not push undo step: {e}")
+
+def save_checkpoint(index):
+    """Save a copy of the scene as the running queue's checkpoint, taken before
+    script index. Returns False if it couldn't be written."""
+    try:
+        os.makedirs(os.path.dirname(CHECKPOINT_PATH), exist_ok=True)
+        internal_op(bpy.ops.wm.save_as_mainfile, filepath=CHECKPOINT_PATH, copy=True)
+    except (OSError, RuntimeError) as e:
+        print(f"Could not save queue checkpoint: {e}")
+        return False
+    journal.checkpoint(CHECKPOINT_PATH, index)
+    return True
+
+def step_hash(path):
+    """Content hash of a script for incremental runs, or None if it always reruns."""
+    return metadata.content_hash(path) if step_cacheable(metadata.get(path)) else None
+
+def _depsgraph_updated(scene, depsgraph):
+    for update in depsgraph.updates:
+        _incremental["updated"].add(block_key(update.id.original))
+
+def start_incremental():
+    """Fingerprint the whole scene and start noting which datablocks the
+    depsgraph updates. Returns the fingerprint."""
+    fingerprint = SceneFingerprint(bpy.data, bpy.path.abspath)
+    fingerprint.full()
+    _incremental.update(fingerprint=fingerprint, updated=set())
+    if _depsgraph_updated not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(_depsgraph_updated)
+    return fingerprint.state()
+
+def incremental_state(context):
+    """Fingerprint after a script, rehashing the geometry only of what it updated."""
+    context.view_layer.update()  # Flush the script's pending updates to the handler
+    fingerprint = _incremental["fingerprint"]
+    fingerprint.update(_incremental["updated"])
+    _incremental["updated"] = set()
+    return fingerprint.state()
+
+def stop_incremental():
+    if _depsgraph_updated in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_depsgraph_updated)
+    _incremental.update(fingerprint=None, updated=set())
+    incremental.save()
+    incremental.prune()
+
+def save_snapshot(state):
+    """Keep a copy of the scene as the snapshot of state, unless there is one."""
+    path = incremental.snapshot_path(state)
+    try:
+        if os.path.exists(path):
+            os.utime(path)  # Recently used, so pruned last
+            return True
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        internal_op(bpy.ops.wm.save_as_mainfile, filepath=path, copy=True)
+    except (OSError, RuntimeError) as e:
+        print(f"Could not save incremental snapshot: {e}")
+        return False
+    return True
+
+def start_ops_trace(context, name):
+    """Start tracing bpy.ops calls if enabled. Returns True if a trace was started."""
+    if not context.window_manager.bebtools_trace_ops or ops_tracer.active:
+        return False
+    op_class = getattr(bpy.ops, "_BPyOpsSubModOp", None)  # Blender's operator call wrapper
+    if op_class is None:
+        print("bpy.ops tracing is not supported by this Blender version")
+        return False
+    ops_tracer.start(op_class, name)
+    return True
+
+def finish_ops_trace(operator):
+    """Stop tracing, save the trace and report where it went and what dominated."""
+    ops_tracer.stop()
+    try:
+        path = ops_tracer.write(TRACE_DIR)
+    except OSError as e:
+        operator.report({'ERROR'}, f"Could not save bpy.ops trace: {str(e)}")
+        return None
+    top = ", ".join(f"{name} x{calls} ({own * 1000:.0f} ms)" for name, calls, own in ops_tracer.top(3))
+    operator.report({'INFO'}, f"Saved bpy.ops trace to {path}" + (f"; slowest: {top}" if top else ""))
+    return path
+
+def performance_summary(count=5):
+    """[(path, mean seconds, runs, hotspots)] of the slowest scripts recently run."""
+    if _performance["version"] != history.version:
+        rows = []
+        for path, seconds, runs in history.slowest(count):
+            stats = history.latest_profile(path)
+            rows.append((path, seconds, runs, hotspots(stats) if stats else []))
+        _performance["rows"] = rows
+        _performance["version"] = history.version
+    return _performance["rows"]
+
+def queue_eta():
+    """Seconds the running queue is expected to still take, or None if unknown."""
+    if not queue_run["running"]:
+        return None
+    done = queue_run["done"]
+    remaining = queue_run["expected"][done:]
+    known = [seconds for seconds in remaining if seconds is not None]
+    if len(known) < len(remaining):
+        # Scripts never run before: assume the average pace of this queue so far
+        ran = done - queue_run["first"]  # A resumed run started part way through
+        if not ran:
+            return None
+        pace = (time.time() - queue_run["started"]) / ran
+        return sum(known) + pace * (len(remaining) - len(known))
+    return sum(known)
+
+def unload_script_modules():
+    script_modules.unload_all()
+
+def schedule_prewarm(paths=()):
+    """Compile the given scripts, the queue and the most used ones while idle."""
+    wm = bpy.context.window_manager
+    pending = list(paths) + [item.path for item in wm.bebtools_queue] + code_cache.most_used()
+    _prewarm["pending"] = list(dict.fromkeys(pending))
+    if not bpy.app.timers.is_registered(_prewarm_timer):
+        bpy.app.timers.register(_prewarm_timer, first_interval=0.5)
+
+def cancel_prewarm():
+    _prewarm["pending"] = []
+    if bpy.app.timers.is_registered(_prewarm_timer):
+        bpy.app.timers.unregister(_prewarm_timer)
+
+def _prewarm_timer():
+    # One script per tick so the UI never waits on a batch of compiles
+    pending = _prewarm["pending"]
+    if not pending:
+        return None
+    path = pending.pop(0)
+    try:
+        code_cache.get(path)
+    except (OSError, SyntaxError, ValueError):
+        pass  # Reported when the script is actually run
+    return 0.02 if pending else None
+
+def ensure_search_index(refresh=False):
+    """Resync the search index if the library changed since it was last built.
+    A refresh also catches scripts edited in place, which leave the catalog as is."""
+    if refresh:
+        library.refresh()
+        library.save()
+    version = library.version
+    if refresh or search_index.version != version:
+        search_index.sync(library.walk(refresh=False), version)
+        metadata.save()
+
+def script_problem(path):
+    """Why a script can't run here (syntax error, newer Blender needed), or None."""
+    meta = metadata.get(path)
+    if meta is None:
+        return "script file not found"
+    if meta["error"]:
+        return f"syntax error: {meta['error']}"
+    if meta["min_blender"] and tuple(meta["min_blender"]) > tuple(bpy.app.version):
+        return f"needs Blender {'.'.join(map(str, meta['min_blender']))}"
+    return None
+
+def enqueue(context, entries):
+    """Append scripts (catalog entries or list items) to the queue in one pass.
+
+    Scripts already queued are found in a set of the queued paths, so queueing
+    a whole library stays linear. Returns (number added, [(name, problem)] of
+    the scripts left out because they can't run here).
+    """
+    wm = context.window_manager
+    queue = wm.bebtools_queue
+    queued = {item.path for item in queue}
+    added = 0
+    skipped = []
+    for entry in entries:
+        path = entry.path
+        if path in queued:
+            continue
+        problem = script_problem(path)  # Checks the file itself; catalog stamps miss in-place edits
+        if problem:
+            skipped.append((entry.name, problem))
+            continue
+        item = queue.add()
+        item.name = entry.name
+        item.path = path
+        queued.add(path)
+        added += 1
+    metadata.save()
+    if added:
+        wm.bebtools_queue_index = len(queue) - 1
+        tag_redraw_view3d()
+    return added, skipped
+
+def _search_timer():
+    internal_op(bpy.ops.bebtools.search_scripts)
+    return None
+
+def schedule_search(self, context):
+    # Update callback of bebtools_search_query: restart the debounce window
+    if bpy.app.timers.is_registered(_search_timer):
+        bpy.app.timers.unregister(_search_timer)
+    bpy.app.timers.register(_search_timer, first_interval=SEARCH_DEBOUNCE)
+
+def cancel_search():
+    if bpy.app.timers.is_registered(_search_timer):
+        bpy.app.timers.unregister(_search_timer)
+
+def tag_redraw_view3d():
+    wm = bpy.context.window_manager
+    for window in wm.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
 
 def update_info_text(context):
     wm = context.window_manager
+    lines = []
     if wm.bebtools_active_index >= 0 and wm.bebtools_active_index < len(wm.bebtools_scripts):
         script_item = wm.bebtools_scripts[wm.bebtools_active_index]
-        wm.bebtools_info_lines.clear()
         if script_item.name == "Back":
-            item = wm.bebtools_info_lines.add()
-            item.name = "Navigate back to parent directory"
+            lines = ["Navigate back to parent directory"]
         elif script_item.is_folder:
-            item = wm.bebtools_info_lines.add()
-            item.name = f"Folder: {script_item.name}"
+            lines = [f"Folder: {script_item.name}"]
         else:
-            script_path = script_item.path
-            info_file = os.path.splitext(script_path)[0] + ".txt"
-            if os.path.exists(info_file):
-                with open(info_file, "r") as f:
-                    for line in f.read().split('\n'):
-                        item = wm.bebtools_info_lines.add()
-                        item.name = line
-            else:
-                item = wm.bebtools_info_lines.add()
-                item.name = f"No instructions found for '{script_item.name}'."
-    else:
-        wm.bebtools_info_lines.clear()
+            lines = instructions.lines(script_item.path)
+            if lines is None:
+                meta = metadata.get(script_item.path)  # No instructions file: fall back to the docstring
+                if meta and meta["docstring"]:
+                    lines = meta["docstring"].split('\n')
+                else:
+                    lines = [f"No instructions found for '{script_item.name}'."]
+    _info["lines"] = lines
+    _info["shown"] = 0
+    wm.bebtools_info_lines.clear()
+    more_info_lines(wm)
+
+def more_info_lines(wm):
+    """Add the next batch of info rows."""
+    lines = _info["lines"]
+    end = min(len(lines), _info["shown"] + INFO_BATCH)
+    collection = wm.bebtools_info_lines
+    for line in lines[_info["shown"]:end]:
+        item = collection.add()
+        item.name = line
+    _info["shown"] = end
+
+def _info_lines_timer():
+    more_info_lines(bpy.context.window_manager)
+    tag_redraw_view3d()
+    return None
+
+def request_info_lines(index):
+    # Called by the info list while drawing row index, where rows can't be added
+    if index >= _info["shown"] - 1 and _info["shown"] < len(_info["lines"]):
+        if not bpy.app.timers.is_registered(_info_lines_timer):
+            bpy.app.timers.register(_info_lines_timer, first_interval=0.0)
 
 def open_or_reuse_text_editor(context, text_block):
     for area in context.screen.areas:
@@ -53,8 +53,12 @@ class BEBTOOLS_OT_ImportAllFBX(Operator):
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
 
-# Register the operator (runs when script is loaded by Beb.Tools)
-bpy.utils.register_class(BEBTOOLS_OT_ImportAllFBX)
+# Beb.Tools imports this script once and calls register(), then run() on every Run
+def register():
+    bpy.utils.register_class(BEBTOOLS_OT_ImportAllFBX)
 
-# When called from Beb.Tools "Apply", this executes the operator
-bpy.ops.bebtools.import_all_fbx('INVOKE_DEFAULT')
\ No newline at end of file
+def unregister():
+    bpy.utils.unregister_class(BEBTOOLS_OT_ImportAllFBX)
+
+def run(context, **params):
+    bpy.ops.bebtools.import_all_fbx('INVOKE_DEFAULT')
@@ -53,8 +53,12 @@ class BEBTOOLS_OT_ImportAllGLB(Operator):
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
 
-# Register the operator
-bpy.utils.register_class(BEBTOOLS_OT_ImportAllGLB)
+# Beb.Tools imports this script once and calls register(), then run() on every Run
+def register():
+    bpy.utils.register_class(BEBTOOLS_OT_ImportAllGLB)
 
-# Execute with file browser
-bpy.ops.bebtools.import_all_glb('INVOKE_DEFAULT')
\ No newline at end of file
+def unregister():
+    bpy.utils.unregister_class(BEBTOOLS_OT_ImportAllGLB)
+
+def run(context, **params):
+    bpy.ops.bebtools.import_all_glb('INVOKE_DEFAULT')
\ No newline at end of file
@@ -53,8 +53,12 @@ class BEBTOOLS_OT_ImportAllUSD(Operator):
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
 
-# Register the operator
-bpy.utils.register_class(BEBTOOLS_OT_ImportAllUSD)
+# Beb.Tools imports this script once and calls register(), then run() on every Run
+def register():
+    bpy.utils.register_class(BEBTOOLS_OT_ImportAllUSD)
 
-# Execute with file browser
-bpy.ops.bebtools.import_all_usd('INVOKE_DEFAULT')
\ No newline at end of file
+def unregister():
+    bpy.utils.unregister_class(BEBTOOLS_OT_ImportAllUSD)
+
+def run(context, **params):
+    bpy.ops.bebtools.import_all_usd('INVOKE_DEFAULT')
\ No newline at end of file
@@ -106,6 +106,12 @@ class BEBTOOLS_OT_RenderCollections(Operator):
         layout.prop(self, "transparent")
         layout.prop(self, "file_format")
 
-# Register and run for Beb.Tools compatibility
-bpy.utils.register_class(BEBTOOLS_OT_RenderCollections)
-bpy.ops.bebtools.render_collections('INVOKE_DEFAULT')
\ No newline at end of file
+# Beb.Tools imports this script once and calls register(), then run() on every Run
+def register():
+    bpy.utils.register_class(BEBTOOLS_OT_RenderCollections)
+
+def unregister():
+    bpy.utils.unregister_class(BEBTOOLS_OT_RenderCollections)
+
+def run(context, **params):
+    bpy.ops.bebtools.render_collections('INVOKE_DEFAULT')